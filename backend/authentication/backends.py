@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .hashing import HashingOverloaded, check_user_password, hash_password
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend that hashes on the bounded pool in hashing.py.
+
+    When the pool turns a login away, a caller that passed no request
+    (the API login serializer) gets HashingOverloaded to answer with a
+    503. Request-driven logins such as /admin/ get PermissionDenied,
+    which authenticate() reports as a failed login instead of a 500.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        try:
+            return self._authenticate(username, password, **kwargs)
+        except HashingOverloaded:
+            if request is None:
+                raise
+            raise PermissionDenied("Too many sign-ins in progress")
+
+    def _authenticate(self, username, password, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Spend a hash anyway, so unknown users take as long as known ones.
+            hash_password(password)
+            return None
+        if check_user_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class HashingOverloaded(Exception):
+    """The hashing pool is full, or the wait for a worker ran out."""
+
+
+def default_workers():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class HashingPool:
+    """Bounded pool for password hashing.
+
+    PBKDF2 releases the GIL, so `workers` threads hash on that many cores
+    while request threads wait. At most `workers + max_pending` hashes are
+    admitted at once; beyond that callers get HashingOverloaded straight
+    away instead of piling onto saturated CPUs, and so does a caller
+    still queued after `timeout` seconds. Only the queue wait is timed: a
+    hash that has started is always waited for. The bound is per process.
+    """
+
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.capacity = workers + max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queue_ms = 0.0
+        self.hash_ms = 0.0
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingOverloaded("Password hashing pool is full")
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        started = threading.Event()
+        future = self._executor.submit(self._call, started, time.perf_counter(), func, args)
+        # cancel() fails once a worker has picked the hash up, in which
+        # case it is waited for like any other.
+        if not started.wait(self.timeout) and future.cancel():
+            self._release()
+            with self._lock:
+                self.timed_out += 1
+            raise HashingOverloaded("Timed out waiting for a password hashing worker")
+        return future.result()
+
+    def _call(self, started_event, queued_at, func, args):
+        started_event.set()
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.completed += 1
+                self.queue_ms += (started - queued_at) * 1000
+                self.hash_ms += (finished - started) * 1000
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            completed = self.completed
+            return {
+                'workers': self.workers,
+                'capacity': self.capacity,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'completed': completed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'avg_queue_ms': round(self.queue_ms / completed, 3) if completed else 0.0,
+                'avg_hash_ms': round(self.hash_ms / completed, 3) if completed else 0.0,
+            }
+
+
+_pool = None
+_pool_config = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process's pool, rebuilt if its settings have changed."""
+    global _pool, _pool_config
+    workers = getattr(settings, 'LOGIN_HASH_WORKERS', None) or default_workers()
+    config = (
+        workers,
+        getattr(settings, 'LOGIN_HASH_MAX_PENDING', workers * 4),
+        getattr(settings, 'LOGIN_HASH_TIMEOUT', 5.0),
+    )
+    with _pool_lock:
+        if _pool_config != config:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool, _pool_config = HashingPool(*config), config
+        return _pool
+
+
+def _verify(password, encoded):
+    outdated = []
+    valid = check_password(password, encoded, setter=lambda raw_password: outdated.append(True))
+    return valid, bool(outdated)
+
+
+def check_user_password(user, password):
+    """user.check_password() with the hashing done on the pool.
+
+    A hash made with an older hasher or fewer iterations than the first
+    entry of PASSWORD_HASHERS is replaced on a successful check, when the
+    pool has room for the extra hash. The update is conditional on the
+    old hash, so a password changed in the meantime is never overwritten.
+    """
+    pool = get_pool()
+    valid, outdated = pool.run(_verify, password, user.password)
+    if valid and outdated:
+        try:
+            encoded = pool.run(make_password, password)
+        except HashingOverloaded:
+            # The password was accepted; the upgrade waits for a quieter login.
+            return valid
+        type(user)._default_manager.filter(pk=user.pk, password=user.password).update(password=encoded)
+        user.password = encoded
+    return valid
+
+
+def hash_password(password):
+    return get_pool().run(make_password, password)
+
+
+def stats():
+    return get_pool().stats()
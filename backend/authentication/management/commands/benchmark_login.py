@@ -0,0 +1,84 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from authentication.hashing import HashingOverloaded, _verify, default_workers, get_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password checks per second (the CPU cost of a login) with C concurrent "
+        "clients, hashing inline in each request thread versus on the bounded pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=64)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--workers', type=int, default=0, help="Pool size (default: one per core).")
+        parser.add_argument(
+            '--max-pending', type=int, default=getattr(settings, 'LOGIN_HASH_MAX_PENDING', 32),
+            help="Admission limit beyond the workers; excess logins are rejected."
+        )
+
+    def burst(self, check, logins, concurrency):
+        latencies, rejected = [], []
+        remaining = iter(range(logins))
+        lock = threading.Lock()
+
+        def client():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                started = time.perf_counter()
+                try:
+                    check()
+                except HashingOverloaded:
+                    rejected.append(1)
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return {
+            'per_second': len(latencies) / elapsed,
+            'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+            'rejected': len(rejected),
+        }
+
+    def report(self, label, result, cores):
+        self.stdout.write(
+            f"{label}: {result['per_second']:.1f} logins/s, {result['per_second'] / cores:.1f}/s per core, "
+            f"p50 {result['p50_ms']:.0f} ms, p95 {result['p95_ms']:.0f} ms, {result['rejected']} rejected"
+        )
+
+    def handle(self, *args, **options):
+        encoded = make_password('benchmark-password')
+        cores = default_workers()
+        workers = options['workers'] or cores
+        self.stdout.write(f"{cores} core(s), {options['concurrency']} concurrent clients, {options['logins']} logins")
+
+        inline = self.burst(
+            lambda: check_password('benchmark-password', encoded), options['logins'], options['concurrency']
+        )
+        self.report("inline", inline, cores)
+
+        with override_settings(LOGIN_HASH_WORKERS=workers, LOGIN_HASH_MAX_PENDING=options['max_pending']):
+            pool = get_pool()
+            pooled = self.burst(
+                lambda: pool.run(_verify, 'benchmark-password', encoded), options['logins'], options['concurrency']
+            )
+            self.report(f"pool ({workers} workers)", pooled, cores)
+            self.stdout.write(f"pool stats: {pool.stats()}")
@@ -6,6 +6,8 @@ from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.core.mail import send_mail
 from django.conf import settings
+from .hashing import hash_password
+from .usernames import create_user_with_unique_username
 
 
 class SignupSerializer(serializers.ModelSerializer):
@@ -31,31 +33,15 @@ class SignupSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         name = validated_data.pop('name')
         role = validated_data.pop('role')
-        email = validated_data['email']
-        username = email.split('@')[0]
-
-        counter = 1
-        original_username = username
-        while User.objects.filter(username=username).exists():
-            username = f"{original_username}{counter}"
-            counter += 1
-        user = User.objects.create_user(
-            username=username,
-            email=email,
+        # Admins and managers both get admin-site access; only admins are superusers.
+        return create_user_with_unique_username(
+            validated_data['email'],
             password=validated_data['password'],
             first_name=name,
+            is_staff=True,
+            is_superuser=role == 'admin',
         )
 
-        if role == 'admin':
-            user.is_staff = True
-            user.is_superuser = True
-        else:  # manager
-            user.is_staff = True
-            user.is_superuser = False
-        
-        user.save()
-        return user
-
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -72,6 +58,8 @@ class LoginSerializer(serializers.Serializer):
             user_obj = User.objects.get(email=email)
             user = authenticate(username=user_obj.username, password=password)
         except User.DoesNotExist:
+            # Spend a hash anyway, so unknown emails take as long as known ones.
+            hash_password(password)
             raise serializers.ValidationError('Invalid email or password.')
         
         if not user:
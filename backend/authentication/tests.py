@@ -1,3 +1,177 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from unittest import mock
+import io
+import os
+import tempfile
+import threading
 
-# Create your tests here.
+from .hashing import HashingOverloaded, HashingPool, get_pool
+from .usernames import allocate_usernames, create_user_with_unique_username, existing_usernames
+
+
+class UsernameAllocationTest(APITestCase):
+
+    def signup(self, email, role='manager'):
+        return self.client.post('/api/auth/signup/', {
+            'name': 'Jo Smith', 'email': email, 'password': 'testpass123', 'role': role
+        }, format='json')
+
+    def test_signup_takes_next_free_suffix(self):
+        for username in ['jo', 'jo1', 'jo2', 'jo4', 'joanna']:
+            User.objects.create(username=username, email=f'{username}@old.example.com')
+
+        response = self.signup('jo@example.com')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['user']['username'], 'jo3')
+        self.assertEqual(response.data['user']['role'], 'manager')
+        self.assertEqual(self.signup('jo@other.example.com').data['user']['username'], 'jo5')
+
+    def test_admin_signup_flags(self):
+        user = User.objects.get(username=self.signup('boss@example.com', role='admin').data['user']['username'])
+        self.assertTrue(user.is_staff and user.is_superuser)
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_collisions_cost_one_query(self):
+        User.objects.bulk_create([User(username=f'sam{i}' if i else 'sam') for i in range(50)])
+        with self.assertNumQueries(1):
+            self.assertEqual(allocate_usernames(['sam', 'sam', 'new']), ['sam50', 'sam51', 'new'])
+
+    def test_only_candidate_names_are_loaded(self):
+        for username in ['jo', 'jo1', 'joanna', 'jo1x', 'a.b', 'axb', 'a.b12']:
+            User.objects.create(username=username)
+        self.assertEqual(existing_usernames(['jo', 'a.b']), {'jo', 'jo1', 'a.b', 'a.b12'})
+
+    def test_retries_when_name_taken_concurrently(self):
+        User.objects.create(username='race')
+        with mock.patch('authentication.usernames.allocate_usernames', side_effect=[['race'], ['race1']]):
+            user = create_user_with_unique_username('race@example.com', 'testpass123')
+        self.assertEqual(user.username, 'race1')
+
+        with mock.patch('authentication.usernames.allocate_usernames', return_value=['race']):
+            with self.assertRaises(IntegrityError):
+                create_user_with_unique_username('race@other.example.com', 'testpass123')
+
+
+class ProvisionUsersTest(APITestCase):
+
+    def test_creates_managers_in_batches(self):
+        User.objects.create(username='ann', email='ann@example.com')
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('email,name\n')
+            csv_file.write('ann@example.com,Existing Ann\n')
+            for i in range(7):
+                csv_file.write(f'ann@team{i}.example.com,Ann {i}\n')
+            csv_file.write('not-an-email,Broken\n')
+        self.addCleanup(os.unlink, csv_file.name)
+
+        call_command('provision_users', csv_file.name, '--batch-size', '3', '--password', 'start1234',
+                     stdout=io.StringIO(), stderr=io.StringIO())
+
+        created = User.objects.filter(email__startswith='ann@team')
+        self.assertEqual(
+            sorted(created.values_list('username', flat=True)),
+            sorted(['ann1', 'ann2', 'ann3', 'ann4', 'ann5', 'ann6', 'ann7'])
+        )
+        user = created.get(email='ann@team3.example.com')
+        self.assertEqual(user.first_name, 'Ann 3')
+        self.assertTrue(user.is_staff)
+        self.assertFalse(user.is_superuser)
+        self.assertTrue(user.check_password('start1234'))
+        self.assertEqual(len(set(created.values_list('password', flat=True))), 7)
+
+
+FAST_HASHERS = [
+    'django.contrib.auth.hashers.SHA1PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, LOGIN_HASH_WORKERS=2, LOGIN_HASH_MAX_PENDING=2)
+class PooledLoginTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='shift', email='shift@example.com', password='testpass123')
+
+    def login(self, password='testpass123', email='shift@example.com'):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': password}, format='json')
+
+    def test_login_checks_password_on_pool(self):
+        completed = get_pool().stats()['completed']
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login(password='wrong-password').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_pool().stats()['completed'], completed + 2)
+
+    def test_outdated_hash_is_replaced_on_login(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('testpass123', hasher='md5'))
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('sha1$'))
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_rehash_is_skipped_when_pool_is_full(self):
+        outdated = make_password('testpass123', hasher='md5')
+        User.objects.filter(pk=self.user.pk).update(password=outdated)
+        with mock.patch('authentication.hashing.make_password', side_effect=HashingOverloaded):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, outdated)
+
+    def test_inactive_user_cannot_log_in(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_full_pool_rejects_login(self):
+        release = threading.Event()
+        pool = get_pool()
+        blockers = [threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(pool.capacity)]
+        for blocker in blockers:
+            blocker.start()
+        try:
+            while pool.stats()['in_flight'] < pool.capacity:
+                release.wait(0.01)
+            response = self.login()
+        finally:
+            release.set()
+            for blocker in blockers:
+                blocker.join()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertGreaterEqual(pool.stats()['rejected'], 1)
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    def test_unknown_email_spends_a_hash(self):
+        completed = get_pool().stats()['completed']
+        self.assertEqual(self.login(email='nobody@example.com').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_pool().stats()['completed'], completed + 1)
+
+    def test_overloaded_admin_login_is_a_failed_login(self):
+        with mock.patch('authentication.backends.check_user_password', side_effect=HashingOverloaded):
+            response = self.client.post('/admin/login/', {'username': 'shift', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_queued_past_timeout_is_rejected(self):
+        pool = HashingPool(workers=1, max_pending=1, timeout=0.2)
+        self.addCleanup(pool.shutdown)
+        running, release = threading.Event(), threading.Event()
+        results = []
+        blocker = threading.Thread(target=lambda: results.append(
+            pool.run(lambda: running.set() or release.wait(5))
+        ))
+        blocker.start()
+        self.assertTrue(running.wait(5))
+        with self.assertRaises(HashingOverloaded):
+            pool.run(make_password, 'x')
+        release.set()
+        blocker.join()
+        # The running hash outlived the timeout but was still waited for;
+        # the queued one was dropped, not run late.
+        self.assertEqual(results, [True])
+        self.assertEqual(pool.stats()['completed'], 1)
+        self.assertEqual(pool.stats()['timed_out'], 1)
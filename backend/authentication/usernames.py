@@ -0,0 +1,69 @@
+import re
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+USERNAME_MAX_LENGTH = User._meta.get_field('username').max_length
+# Room left after the base for a numeric suffix.
+SUFFIX_LENGTH = 10
+
+
+def username_base(email):
+    return email.split('@')[0][:USERNAME_MAX_LENGTH - SUFFIX_LENGTH]
+
+
+def existing_usernames(bases):
+    """Taken usernames that `allocate_usernames` could pick for `bases`
+    (a base alone or followed by digits), in one query.
+
+    The prefix match is served by auth_user.username's index (PostgreSQL
+    adds a varchar_pattern_ops index for LIKE 'prefix%'); the regex then
+    drops names like "johnson" for base "john" before they are loaded.
+    """
+    query = Q()
+    for base in set(bases):
+        query |= Q(username__startswith=base, username__regex=rf'^{re.escape(base)}\d*$')
+    if not query:
+        return set()
+    return set(User.objects.filter(query).values_list('username', flat=True))
+
+
+def allocate_usernames(bases, taken=None):
+    """A free username per base, in order: the base itself if free, else
+    the base with the lowest free numeric suffix (john, john1, john2...)."""
+    if taken is None:
+        taken = existing_usernames(bases)
+    counters = {}
+    usernames = []
+    for base in bases:
+        username = base
+        counter = counters.get(base, 1)
+        while username in taken:
+            username = f'{base}{counter}'
+            counter += 1
+        counters[base] = counter
+        taken.add(username)
+        usernames.append(username)
+    return usernames
+
+
+def create_user_with_unique_username(email, password, attempts=3, **fields):
+    """Create a user named after the email's local part.
+
+    The name is picked from one snapshot of the taken names; if a
+    concurrent signup takes it first, the unique constraint fails and
+    the allocation is retried. The password is hashed once, up front.
+    """
+    user = User(email=User.objects.normalize_email(email), **fields)
+    user.set_password(password)
+    base = username_base(email)
+    for attempt in range(attempts):
+        user.username, = allocate_usernames([base])
+        try:
+            with transaction.atomic():
+                user.save()
+            return user
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
@@ -14,6 +14,7 @@ from .serializers import (
     SignupSerializer, LoginSerializer, UserSerializer,
     PasswordResetRequestSerializer, PasswordResetConfirmSerializer
 )
+from .hashing import HashingOverloaded
 
 def set_auth_cookie(response, token):
     cookie_settings = {
@@ -62,8 +63,18 @@ def signup(request):
 @permission_classes([AllowAny])
 def login(request):
     serializer = LoginSerializer(data=request.data)
-    
-    if serializer.is_valid():
+
+    try:
+        is_valid = serializer.is_valid()
+    except HashingOverloaded:
+        response = Response({
+            'success': False,
+            'message': 'Too many sign-ins in progress. Please try again in a moment.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '1'
+        return response
+
+    if is_valid:
         user = serializer.validated_data['user']
         token, created = Token.objects.get_or_create(user=user)
         user_serializer = UserSerializer(user)
@@ -1,6 +1,11 @@
 from django.contrib import admin
-from .models import InventoryItem, Supplier,Transaction
+from .models import InventoryItem, Supplier,Transaction,InventorySnapshot,SupplierDeletionJob,CategoryThreshold,SlowQuery,IdempotencyKey
 
 admin.site.register(Supplier)
 admin.site.register(InventoryItem)
-admin.site.register(Transaction)
\ No newline at end of file
+admin.site.register(Transaction)
+admin.site.register(InventorySnapshot)
+admin.site.register(SupplierDeletionJob)
+admin.site.register(CategoryThreshold)
+admin.site.register(SlowQuery)
+admin.site.register(IdempotencyKey)
@@ -0,0 +1,190 @@
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import InventoryItem, Transaction
+from .report_cache import report_cache
+
+
+ITEM_DTYPE = np.dtype([('id', 'i8'), ('quantity', 'i8'), ('price', 'f8')])
+DEMAND_DTYPE = np.dtype([('item_id', 'i8'), ('demand', 'f8')])
+
+ABC_LABELS = np.array(['A', 'B', 'C'])
+
+
+def analytics_settings():
+    return {
+        'window_days': getattr(settings, 'ANALYTICS_WINDOW_DAYS', 90),
+        'lead_time_days': getattr(settings, 'ANALYTICS_LEAD_TIME_DAYS', 7),
+        'service_z': getattr(settings, 'ANALYTICS_SERVICE_Z', 1.65),
+        'abc_cutoffs': getattr(settings, 'ANALYTICS_ABC_CUTOFFS', (0.80, 0.95)),
+        'chunk_size': getattr(settings, 'ANALYTICS_CHUNK_SIZE', 5000),
+    }
+
+
+def load_items(chunk_size):
+    rows = (
+        InventoryItem.objects.order_by('id')
+        .values_list('id', 'quantity', 'price')
+        .iterator(chunk_size=chunk_size)
+    )
+    return np.fromiter(rows, dtype=ITEM_DTYPE)
+
+
+def load_daily_demand(since, chunk_size):
+    # Net movement per item per day is aggregated in the database; only the
+    # days with a net outflow count as demand.
+    rows = (
+        Transaction.objects.filter(created_at__gte=since, item_id__isnull=False)
+        .annotate(day=TruncDate('created_at'))
+        .values('item_id', 'day')
+        .annotate(net=Sum('quantity_delta'))
+        .filter(net__lt=0)
+        .values_list('item_id', 'net')
+        .order_by()
+        .iterator(chunk_size=chunk_size)
+    )
+    demand = np.fromiter(rows, dtype=DEMAND_DTYPE)
+    demand['demand'] *= -1
+    return demand
+
+
+def compute_metrics(items, demand, window_days, lead_time_days, service_z, abc_cutoffs):
+    """Compute per-SKU reorder points, days of cover and ABC classes.
+
+    `items` must be sorted by id. `demand` holds one row per item per day
+    with a net outflow; days without a row count as zero demand.
+    """
+    count = len(items)
+    ids = items['id']
+    quantity = items['quantity'].astype(np.float64)
+    price = items['price']
+
+    # Movements of deleted items have no matching id and are dropped.
+    if count:
+        idx = np.minimum(np.searchsorted(ids, demand['item_id']), count - 1)
+        known = ids[idx] == demand['item_id']
+    else:
+        idx = np.zeros(len(demand), dtype=np.intp)
+        known = np.zeros(len(demand), dtype=bool)
+    idx = idx[known]
+    daily = demand['demand'][known]
+
+    total = np.bincount(idx, weights=daily, minlength=count)
+    total_sq = np.bincount(idx, weights=daily * daily, minlength=count)
+    mean = total / window_days
+    std = np.sqrt(np.maximum(total_sq / window_days - mean * mean, 0.0))
+
+    safety_stock = service_z * std * np.sqrt(lead_time_days)
+    reorder_point = np.ceil(mean * lead_time_days + safety_stock)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_of_cover = np.where(mean > 0, quantity / mean, np.inf)
+
+    usage_value = total * price
+    order = np.argsort(-usage_value, kind='stable')
+    grand_total = usage_value.sum()
+    abc = np.full(count, 2, dtype=np.int8)
+    if grand_total > 0:
+        sorted_value = usage_value[order]
+        share_before = (np.cumsum(sorted_value) - sorted_value) / grand_total
+        ranked = np.where(share_before < abc_cutoffs[0], 0, np.where(share_before < abc_cutoffs[1], 1, 2))
+        ranked[sorted_value <= 0] = 2
+        abc[order] = ranked
+
+    return {
+        'id': ids,
+        'quantity': items['quantity'],
+        'avg_daily_demand': mean,
+        'demand_std': std,
+        'safety_stock': safety_stock,
+        'reorder_point': reorder_point.astype(np.int64),
+        'days_of_cover': days_of_cover,
+        'usage_value': usage_value,
+        'abc_class': abc,
+        'needs_reorder': items['quantity'] <= reorder_point,
+    }
+
+
+def build_inventory_analytics():
+    options = analytics_settings()
+    started = timezone.now()
+    since = started - timedelta(days=options['window_days'])
+
+    items = load_items(options['chunk_size'])
+    demand = load_daily_demand(since, options['chunk_size'])
+    metrics = compute_metrics(
+        items,
+        demand,
+        options['window_days'],
+        options['lead_time_days'],
+        options['service_z'],
+        options['abc_cutoffs'],
+    )
+    metrics['generated_at'] = started
+    metrics['params'] = {
+        'window_days': options['window_days'],
+        'lead_time_days': options['lead_time_days'],
+        'service_z': options['service_z'],
+    }
+    return metrics
+
+
+def get_inventory_analytics():
+    # The arrays stay in this process's memory, keyed by data version:
+    # pickling them through the shared cache costs more than it saves,
+    # and memcached would refuse them outright.
+    return report_cache.get('inventory_analytics', build_inventory_analytics)
+
+
+def summarize(metrics):
+    counts = np.bincount(metrics['abc_class'], minlength=3)
+    return {
+        'generated_at': metrics['generated_at'].isoformat(),
+        'params': metrics['params'],
+        'total_skus': int(len(metrics['id'])),
+        'needs_reorder': int(metrics['needs_reorder'].sum()),
+        'abc_counts': {str(label): int(n) for label, n in zip(ABC_LABELS, counts)},
+    }
+
+
+def select_rows(metrics, abc_class=None, needs_reorder=False, sort='days_of_cover', limit=100):
+    mask = np.ones(len(metrics['id']), dtype=bool)
+    if abc_class:
+        mask &= metrics['abc_class'] == int(np.flatnonzero(ABC_LABELS == abc_class)[0])
+    if needs_reorder:
+        mask &= metrics['needs_reorder']
+
+    positions = np.flatnonzero(mask)
+    if sort == 'usage_value':
+        key = -metrics['usage_value'][positions]
+    else:
+        key = metrics['days_of_cover'][positions]
+    positions = positions[np.argsort(key, kind='stable')[:limit]]
+
+    ids = metrics['id'][positions].tolist()
+    names = dict(
+        (pk, (sku, name)) for pk, sku, name in
+        InventoryItem.objects.filter(id__in=ids).values_list('id', 'sku', 'item_name')
+    )
+
+    rows = []
+    for pos, pk in zip(positions.tolist(), ids):
+        sku, name = names.get(pk, (None, None))
+        cover = metrics['days_of_cover'][pos]
+        rows.append({
+            'id': pk,
+            'sku': sku,
+            'item_name': name,
+            'quantity': int(metrics['quantity'][pos]),
+            'avg_daily_demand': round(float(metrics['avg_daily_demand'][pos]), 3),
+            'reorder_point': int(metrics['reorder_point'][pos]),
+            'days_of_cover': round(float(cover), 1) if np.isfinite(cover) else None,
+            'abc_class': str(ABC_LABELS[metrics['abc_class'][pos]]),
+            'needs_reorder': bool(metrics['needs_reorder'][pos]),
+        })
+    return rows
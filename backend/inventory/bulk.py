@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .detail_cache import item_detail_cache, supplier_detail_cache
+from .lookup_cache import forget_item
+from .low_stock import evaluate_items
+from .models import InventoryItem, Transaction
+from .report_cache import data_changed
+
+# Item fields a bulk update may set.
+BULK_UPDATE_FIELDS = ('price', 'quantity', 'category')
+ITEM_FILTERS = ('category', 'supplier', 'search')
+ROW_FIELDS = ('id', 'sku', 'item_name', 'quantity', 'price', 'category', 'supplier_id')
+
+
+def filter_inventory_items(queryset, params):
+    """Apply the item list filters (category, supplier name, search)."""
+    category = params.get('category')
+    supplier = params.get('supplier')
+    search = params.get('search')
+
+    if category:
+        queryset = queryset.filter(category__iexact=category)
+
+    if supplier:
+        queryset = queryset.filter(supplier__name__iexact=supplier)
+
+    if search:
+        queryset = queryset.filter(
+            Q(item_name__icontains=search) | Q(sku__icontains=search)
+        )
+    return queryset
+
+
+def _user_name(user):
+    return user.first_name if user.first_name else user.username
+
+
+def _in_chunks(queryset, handle):
+    """Call `handle(rows)` on batches of item rows in id order, each batch
+    locked and handled inside its own transaction. Returns the row count.
+
+    The callback runs inside the atomic block, so an error in it rolls the
+    batch back and releases its locks. Keyset pagination on id keeps each
+    batch's query cheap and stays correct when an update moves rows out
+    of the filter.
+    """
+    chunk_size = getattr(settings, 'BULK_CHUNK_SIZE', 500)
+    last_id = 0
+    handled = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.filter(id__gt=last_id)
+                .select_for_update(of=('self',))
+                .order_by('id')
+                .values(*ROW_FIELDS)[:chunk_size]
+            )
+            if not rows:
+                return handled
+            handle(rows)
+        handled += len(rows)
+        last_id = rows[-1]['id']
+
+
+def _forget(rows):
+    for row in rows:
+        forget_item(row['id'], row['sku'])
+    item_detail_cache.invalidate(*[row['id'] for row in rows])
+    data_changed()
+
+
+def delete_item_rows(rows, user_id, user_name, details):
+    """Ledger and delete a batch of item rows (dicts with ROW_FIELDS).
+
+    Must run inside the transaction that locked the rows.
+    """
+    Transaction.objects.bulk_create([
+        Transaction(
+            transaction_type='delete',
+            item_name=row['item_name'],
+            item_id=row['id'],
+            user_id=user_id,
+            user_name=user_name,
+            details=details(row),
+            quantity_delta=-row['quantity'],
+            value_delta=-(row['quantity'] * row['price']),
+            category=row['category'] or '',
+            item_count_delta=-1,
+        )
+        for row in rows
+    ])
+    InventoryItem.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    supplier_detail_cache.invalidate(*{row['supplier_id'] for row in rows})
+    _forget(rows)
+
+
+def bulk_delete_items(queryset, user):
+    user_name = _user_name(user)
+    return _in_chunks(queryset, lambda rows: delete_item_rows(
+        rows, user.pk, user_name, lambda row: f"Removed SKU {row['sku']} (bulk)"
+    ))
+
+
+def _update_ledger_rows(row, changes, user, user_name):
+    old_value = row['quantity'] * row['price']
+    quantity = changes.get('quantity', row['quantity'])
+    new_value = quantity * changes.get('price', row['price'])
+    old_category = row['category'] or ''
+    new_category = (changes['category'] or '') if 'category' in changes else old_category
+
+    def entry(details, quantity_delta, value_delta, item_count_delta, category):
+        return Transaction(
+            transaction_type='update', item_name=row['item_name'], item_id=row['id'],
+            user=user, user_name=user_name, details=details,
+            quantity_delta=quantity_delta, value_delta=value_delta,
+            item_count_delta=item_count_delta, category=category,
+        )
+
+    if new_category == old_category:
+        return [entry("Updated (bulk)", quantity - row['quantity'], new_value - old_value, 0, old_category)]
+    # Same shape as a single update that changes category: out of one, into the other.
+    return [
+        entry(f"Moved out of {old_category or 'Uncategorized'}", -row['quantity'], -old_value, -1, old_category),
+        entry("Updated (bulk)", quantity, new_value, 1, new_category),
+    ]
+
+
+def bulk_update_items(queryset, changes, user):
+    user_name = _user_name(user)
+
+    def update(rows):
+        InventoryItem.objects.filter(id__in=[row['id'] for row in rows]).update(
+            version=F('version') + 1, updated_at=timezone.now(), **changes
+        )
+        Transaction.objects.bulk_create([
+            entry for row in rows for entry in _update_ledger_rows(row, changes, user, user_name)
+        ])
+        if 'quantity' in changes or 'category' in changes:
+            evaluate_items([row['id'] for row in rows])
+        _forget(rows)
+
+    return _in_chunks(queryset, update)
+
+
+def parse_selection(data):
+    """Build the item queryset a bulk request targets.
+
+    Returns `(queryset, error)`; the request must name item ids or at
+    least one list filter so an empty body can't match every item.
+    """
+    ids = data.get('ids')
+    filters = data.get('filters') or {}
+    if ids is not None and filters:
+        return None, 'Pass either ids or filters, not both'
+
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            return None, 'ids must be a non-empty list of integers'
+        max_ids = getattr(settings, 'BULK_MAX_IDS', 10000)
+        if len(ids) > max_ids:
+            return None, f'ids may name at most {max_ids} items; use filters for larger selections'
+        try:
+            ids = [int(pk) for pk in ids]
+        except (TypeError, ValueError):
+            return None, 'ids must be a non-empty list of integers'
+        return InventoryItem.objects.filter(id__in=ids), None
+
+    if not isinstance(filters, dict):
+        return None, 'filters must be an object'
+    unknown = sorted(set(filters) - set(ITEM_FILTERS))
+    if unknown:
+        return None, f"Unknown filters: {', '.join(unknown)}"
+    if not any(filters.get(name) for name in ITEM_FILTERS):
+        return None, 'Pass ids or at least one of: ' + ', '.join(ITEM_FILTERS)
+    return filter_inventory_items(InventoryItem.objects.all(), filters), None
+
+
+def is_dry_run(data):
+    value = data.get('dry_run', False)
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(value)
@@ -0,0 +1,20 @@
+from .detail_cache import item_detail_cache, supplier_detail_cache
+from .lookup_cache import forget_item, forget_all_items
+
+
+def item_changed(item_id, skus=(), supplier_ids=()):
+    """Drop cached payloads for an item after its write commits.
+
+    `supplier_ids` are the suppliers whose linked item count may have
+    changed (the old and new supplier on a reassignment).
+    """
+    forget_item(item_id, *skus)
+    item_detail_cache.invalidate(item_id)
+    supplier_detail_cache.invalidate(*set(supplier_ids))
+
+
+def supplier_changed(supplier_id):
+    # Item payloads embed the supplier name, so every cached item goes too.
+    forget_all_items()
+    item_detail_cache.invalidate_all()
+    supplier_detail_cache.invalidate(supplier_id)
@@ -0,0 +1,64 @@
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def etag(version):
+    return f'"{version}"'
+
+
+def if_match_versions(request):
+    """Versions accepted by the request's If-Match header.
+
+    None means the update is unconditional (no header, or `*`). Weak tags
+    are accepted because the compression middleware weakens our ETags.
+    """
+    header = request.headers.get('If-Match')
+    if not header:
+        return None
+    tags = parse_etags(header)
+    if tags == ['*']:
+        return None
+    versions = []
+    for tag in tags:
+        value = tag.removeprefix('W/').strip('"')
+        if value.isdigit():
+            versions.append(int(value))
+    return versions
+
+
+def versioned_update(instance, validated_data, versions=None):
+    """Write `validated_data` to the instance's row in a single UPDATE.
+
+    When `versions` is given the UPDATE only matches a row still at one
+    of them, so a concurrent edit makes it touch nothing and None is
+    returned. Either way the version is bumped and the refreshed
+    instance is returned.
+    """
+    model = type(instance)
+    changes = dict(validated_data)
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            changes[field.name] = timezone.now()
+
+    rows = model._default_manager.filter(pk=instance.pk)
+    if versions is not None:
+        rows = rows.filter(version__in=versions)
+    if not rows.update(version=F('version') + 1, **changes):
+        return None
+    instance.refresh_from_db()
+    return instance
+
+
+def precondition_failed(instance):
+    current = type(instance)._default_manager.filter(pk=instance.pk).values_list('version', flat=True).first()
+    response = Response({
+        'error': 'Precondition failed',
+        'details': f'{instance._meta.verbose_name.capitalize()} was modified by another request',
+        'version': current
+    }, status=status.HTTP_412_PRECONDITION_FAILED)
+    if current is not None:
+        response['ETag'] = etag(current)
+    return response
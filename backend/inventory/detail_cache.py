@@ -0,0 +1,122 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from my_project.db_router import primary_only
+from .report_cache import SingleFlight
+
+
+class DetailCache:
+    """Read-through cache of serialized detail payloads.
+
+    Payloads live under `<namespace>:<id>:<generation>:<version>`.
+    Invalidating an object bumps its version and invalidating the whole
+    namespace bumps the generation, so a fill that raced with a write can
+    only land on a key that is never read again. Concurrent misses for the
+    same key are collapsed in-process, and across processes a short cache
+    lock lets one worker fill while the others wait for its result.
+    """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ('hits', 'misses', 'coalesced', 'lock_waits', 'fills', 'invalidations'), 0
+        )
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'DETAIL_CACHE_ALIAS', 'default')]
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _generation_key(self):
+        return f'{self.namespace}:generation'
+
+    def _version_key(self, pk):
+        return f'{self.namespace}:{pk}:version'
+
+    def _data_key(self, pk):
+        generation_key = self._generation_key()
+        version_key = self._version_key(pk)
+        stamps = self.cache.get_many([generation_key, version_key])
+        for key in (generation_key, version_key):
+            if key not in stamps:
+                self.cache.add(key, time.time_ns(), None)
+                stamps[key] = self.cache.get(key)
+        return f'{self.namespace}:{pk}:{stamps[generation_key]}:{stamps[version_key]}'
+
+    def _fill(self, key, loader):
+        cache = self.cache
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        locked = cache.add(lock_key, token, getattr(settings, 'DETAIL_CACHE_LOCK_TIMEOUT', 5))
+        if not locked:
+            # Another process is filling this key; wait briefly for it.
+            self._count('lock_waits')
+            for _ in range(20):
+                time.sleep(0.025)
+                value = cache.get(key)
+                if value is not None:
+                    return value
+        try:
+            # The payload must not be older than the version it is stored
+            # under, so never fill from a lagging replica.
+            with primary_only():
+                value = loader()
+            cache.set(key, value, getattr(settings, 'DETAIL_CACHE_TIMEOUT', 300))
+            self._count('fills')
+            return value
+        finally:
+            # Only release our own lock: if it expired during a slow load,
+            # the key may now belong to another filler.
+            if locked and cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    def get(self, pk, loader):
+        key = self._data_key(pk)
+        value = self.cache.get(key)
+        if value is not None:
+            self._count('hits')
+            return value
+
+        self._count('misses')
+        value, shared = self._flight.do(key, lambda: self._fill(key, loader))
+        if shared:
+            self._count('coalesced')
+        return value
+
+    def _bump(self, key):
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, time.time_ns(), None)
+
+    def invalidate(self, *pks):
+        def bump():
+            for pk in pks:
+                if pk is not None:
+                    self._bump(self._version_key(pk))
+                    self._count('invalidations')
+        transaction.on_commit(bump)
+
+    def invalidate_all(self):
+        transaction.on_commit(lambda: self._bump(self._generation_key()))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+        return stats
+
+
+item_detail_cache = DetailCache('item_detail')
+supplier_detail_cache = DetailCache('supplier_detail')
@@ -0,0 +1,45 @@
+"""Report export formats, imported on first use.
+
+Backends are registered by dotted path so a worker only pays for a
+format's dependencies (reportlab for PDF, ...) once something is
+actually exported in it. EXPORT_BACKENDS in settings adds or replaces
+entries.
+"""
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKENDS = {
+    'csv': 'inventory.export_backends.csv_report.CSVReport',
+    'pdf': 'inventory.export_backends.pdf_report.PDFReport',
+    'xlsx': 'inventory.export_backends.xlsx_report.XLSXReport',
+}
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+class UnknownExportFormat(KeyError):
+    pass
+
+
+def registry():
+    return {**DEFAULT_BACKENDS, **getattr(settings, 'EXPORT_BACKENDS', {})}
+
+
+def get_backend(name):
+    backend = _loaded.get(name)
+    if backend is None:
+        path = registry().get(name)
+        if path is None:
+            raise UnknownExportFormat(name)
+        with _lock:
+            backend = _loaded.get(name)
+            if backend is None:
+                backend = _loaded[name] = import_string(path)()
+    return backend
+
+
+def loaded_backends():
+    return sorted(_loaded)
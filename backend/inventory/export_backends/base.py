@@ -0,0 +1,18 @@
+class ExportBackend:
+    """A report export format.
+
+    `render()` returns the whole document as str or bytes; it runs
+    through the report cache, so it is only called when the data changed.
+    Backends whose output is too large to hold in memory set `streaming`
+    and implement `render_file()`, returning an open file positioned at
+    the start that is streamed to the client and then closed.
+    """
+    content_type = 'application/octet-stream'
+    filename = 'inventory_report'
+    streaming = False
+
+    def render(self):
+        raise NotImplementedError
+
+    def render_file(self):
+        raise NotImplementedError
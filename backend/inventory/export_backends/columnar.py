@@ -0,0 +1,158 @@
+"""Streaming Parquet / Arrow IPC export of the inventory tables.
+
+Rows are read through a server-side cursor and written as record
+batches, so memory stays bounded by EXPORT_BATCH_ROWS whatever the
+table size. Imported lazily: pyarrow is only loaded by a worker that
+serves a columnar export.
+"""
+from datetime import timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from ..models import InventoryItem, Supplier, Transaction
+
+TIMESTAMP = pa.timestamp('us', tz='UTC')
+
+# name -> (model, watermark column, [(column, arrow type), ...])
+TABLES = {
+    'items': (InventoryItem, 'updated_at', [
+        ('id', pa.int64()),
+        ('sku', pa.string()),
+        ('item_name', pa.string()),
+        ('quantity', pa.int64()),
+        ('category', pa.string()),
+        ('price', pa.decimal128(10, 2)),
+        ('supplier_id', pa.int64()),
+        ('reorder_threshold', pa.int64()),
+        ('is_low_stock', pa.bool_()),
+        ('version', pa.int64()),
+        ('created_at', TIMESTAMP),
+        ('updated_at', TIMESTAMP),
+    ]),
+    'suppliers': (Supplier, 'updated_at', [
+        ('id', pa.int64()),
+        ('name', pa.string()),
+        ('email', pa.string()),
+        ('phone', pa.string()),
+        ('address', pa.string()),
+        ('version', pa.int64()),
+        ('created_at', TIMESTAMP),
+        ('updated_at', TIMESTAMP),
+    ]),
+    'transactions': (Transaction, 'created_at', [
+        ('id', pa.int64()),
+        ('transaction_type', pa.string()),
+        ('item_id', pa.int64()),
+        ('item_name', pa.string()),
+        ('user_id', pa.int64()),
+        ('user_name', pa.string()),
+        ('details', pa.string()),
+        ('category', pa.string()),
+        ('quantity_delta', pa.int64()),
+        ('value_delta', pa.decimal128(20, 2)),
+        ('item_count_delta', pa.int64()),
+        ('created_at', TIMESTAMP),
+    ]),
+}
+
+FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+class _ChunkSink:
+    """Write-only file object the Arrow writers flush into; drained after
+    every batch so the response can stream it."""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def schema_for(table):
+    _, _, columns = TABLES[table]
+    return pa.schema(columns)
+
+
+def export_window(table, since=None):
+    """Rows of `table` to export and the watermark closing the window.
+
+    The window is `since < watermark column <= watermark`; passing the
+    returned watermark as the next `since` exports only later changes.
+    Timestamps are taken when a row is written, not when its transaction
+    commits, so rows stamped within EXPORT_WATERMARK_MARGIN seconds of
+    now are left for the next export: a slower transaction may still
+    commit rows stamped before them. Deleted rows are not in the
+    item/supplier tables; their removal is recorded in the transactions
+    table.
+    """
+    model, column, _ = TABLES[table]
+    margin = getattr(settings, 'EXPORT_WATERMARK_MARGIN', 60)
+    queryset = model.objects.filter(**{f'{column}__lte': timezone.now() - timedelta(seconds=margin)})
+    if since is not None:
+        queryset = queryset.filter(**{f'{column}__gt': since})
+    watermark = queryset.aggregate(watermark=Max(column))['watermark']
+    if watermark is None:
+        return queryset.none(), since
+    return queryset.filter(**{f'{column}__lte': watermark}).order_by(column, 'id'), watermark
+
+
+def record_batches(table, queryset):
+    schema = schema_for(table)
+    names = schema.names
+    batch_rows = getattr(settings, 'EXPORT_BATCH_ROWS', 10000)
+
+    def to_batch(rows):
+        columns = list(zip(*rows)) if rows else [[] for _ in names]
+        return pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        )
+
+    rows = []
+    for row in queryset.values_list(*names).iterator(chunk_size=batch_rows):
+        rows.append(row)
+        if len(rows) >= batch_rows:
+            yield to_batch(rows)
+            rows = []
+    if rows:
+        yield to_batch(rows)
+
+
+def stream(table, queryset, export_format):
+    """Yield the encoded file chunk by chunk."""
+    schema = schema_for(table)
+    sink = _ChunkSink()
+    if export_format == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    for batch in record_batches(table, queryset):
+        writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
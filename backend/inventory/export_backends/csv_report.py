@@ -0,0 +1,43 @@
+import csv
+import io
+
+from django.db.models import Count, F, Sum
+
+from ..models import InventoryItem
+from .base import ExportBackend
+
+
+class CSVReport(ExportBackend):
+    content_type = 'text/csv'
+    filename = 'inventory_report.csv'
+
+    def render(self):
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Report Type', 'Category', 'Items Count', 'Total Value'])
+        items = InventoryItem.objects.all()
+        totals = items.aggregate(
+            total_items=Count('id'),
+            total_value=Sum(F('price') * F('quantity'))
+        )
+        writer.writerow([
+            'Summary',
+            'All Items',
+            totals['total_items'] or 0,
+            f"${totals['total_value'] or 0:.2f}"
+        ])
+        writer.writerow([])
+        writer.writerow(['Individual Items', '', '', ''])
+        writer.writerow(['Item Name', 'SKU', 'Category', 'Quantity', 'Price', 'Total Value'])
+    
+        for item in items:
+            writer.writerow([
+                item.item_name,
+                item.sku,
+                item.category or 'Uncategorized',
+                item.quantity,
+                f"${item.price}",
+                f"${float(item.price) * item.quantity:.2f}"
+            ])
+    
+        return output.getvalue()
@@ -0,0 +1,60 @@
+import io
+
+from django.db.models import F, Sum
+from xhtml2pdf import pisa
+
+from ..models import InventoryItem
+from .base import ExportBackend
+
+
+class PDFReport(ExportBackend):
+    content_type = 'application/pdf'
+    filename = 'inventory_report.pdf'
+
+    def render(self):
+        items = InventoryItem.objects.all()
+        total_items = items.count()
+        total_value = InventoryItem.objects.aggregate(
+            total=Sum(F('price') * F('quantity'))
+        )['total'] or 0
+
+        html = f"""
+        <html>
+        <head>
+            <style>
+                body {{ font-family: Arial, sans-serif; }}
+                h1 {{ text-align: center; }}
+                table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
+                th, td {{ border: 1px solid #333; padding: 8px; text-align: left; }}
+            </style>
+        </head>
+        <body>
+            <h1>Inventory Report</h1>
+            <p><b>Total Items:</b> {total_items}</p>
+            <p><b>Total Value:</b> ${total_value:.2f}</p>
+            <br/>
+            <table>
+                <tr>
+                    <th>Item Name</th>
+                    <th>SKU</th>
+                    <th>Category</th>
+                    <th>Quantity</th>
+                    <th>Price</th>
+                    <th>Total Value</th>
+                </tr>
+                {''.join([
+                    f"<tr><td>{i.item_name}</td><td>{i.sku}</td><td>{i.category or 'Uncategorized'}</td><td>{i.quantity}</td><td>${i.price}</td><td>${float(i.price) * i.quantity:.2f}</td></tr>"
+                    for i in items
+                ])}
+            </table>
+        </body>
+        </html>
+        """
+
+        output = io.BytesIO()
+        pisa_status = pisa.CreatePDF(io.StringIO(html), dest=output)
+
+        if pisa_status.err:
+            raise ValueError("Error generating PDF")
+    
+        return output.getvalue()
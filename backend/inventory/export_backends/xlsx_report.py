@@ -0,0 +1,111 @@
+import re
+import tempfile
+
+import xlsxwriter
+from django.conf import settings
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ..models import InventoryItem
+from .base import ExportBackend
+
+# Rows per sheet Excel accepts, header included.
+MAX_SHEET_ROWS = 1048576
+ITEM_HEADERS = ['Item Name', 'SKU', 'Quantity', 'Price', 'Total Value']
+
+
+def sheet_name(label, taken):
+    name = re.sub(r'[\[\]:*?/\\]', '-', label).strip("'")[:31] or 'Sheet'
+    base, counter = name, 2
+    while name.lower() in taken:
+        suffix = f' ({counter})'
+        name = base[:31 - len(suffix)] + suffix
+        counter += 1
+    taken.add(name.lower())
+    return name
+
+
+class XLSXReport(ExportBackend):
+    """Workbook with a summary sheet and one sheet per category.
+
+    Written with xlsxwriter's constant_memory mode: each row is flushed
+    to a temporary file as soon as the next one starts, and items are
+    read through a chunked iterator, so memory does not grow with the
+    catalog. Totals are computed by the database.
+    """
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    filename = 'inventory_report.xlsx'
+    # Served from a temporary file instead of the in-memory report cache.
+    streaming = True
+
+    def render_file(self):
+        output = tempfile.TemporaryFile()
+        workbook = xlsxwriter.Workbook(output, {
+            'constant_memory': True,
+            'tmpdir': getattr(settings, 'EXPORT_TMPDIR', None),
+        })
+        formats = {
+            'header': workbook.add_format({'bold': True}),
+            'money': workbook.add_format({'num_format': '$#,##0.00'}),
+        }
+        taken = set()
+        self.write_summary(workbook, formats, taken)
+        self.write_categories(workbook, formats, taken)
+        workbook.close()
+        output.seek(0)
+        return output
+
+    def items(self):
+        return InventoryItem.objects.annotate(
+            sheet_category=Coalesce('category', Value('')),
+            total_value=ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField()),
+        )
+
+    def write_summary(self, workbook, formats, taken):
+        sheet = workbook.add_worksheet(sheet_name('Summary', taken))
+        sheet.set_column(0, 0, 28)
+        sheet.set_column(1, 3, 16)
+        sheet.write_row(0, 0, ['Category', 'Items Count', 'Total Quantity', 'Total Value'], formats['header'])
+
+        rows = (
+            self.items().values('sheet_category')
+            .annotate(item_count=Count('id'), total_quantity=Sum('quantity'), category_value=Sum('total_value'))
+            .order_by('sheet_category')
+        )
+        row_number = 0
+        for row_number, row in enumerate(rows, start=1):
+            sheet.write_string(row_number, 0, row['sheet_category'] or 'Uncategorized')
+            sheet.write_number(row_number, 1, row['item_count'])
+            sheet.write_number(row_number, 2, row['total_quantity'] or 0)
+            sheet.write_number(row_number, 3, float(row['category_value'] or 0), formats['money'])
+
+        totals = InventoryItem.objects.aggregate(
+            item_count=Count('id'), total_quantity=Sum('quantity'), stock_value=Sum(F('price') * F('quantity'))
+        )
+        total_row = row_number + 1
+        sheet.write_string(total_row, 0, 'All Items', formats['header'])
+        sheet.write_number(total_row, 1, totals['item_count'] or 0)
+        sheet.write_number(total_row, 2, totals['total_quantity'] or 0)
+        sheet.write_number(total_row, 3, float(totals['stock_value'] or 0), formats['money'])
+
+    def write_categories(self, workbook, formats, taken):
+        rows = (
+            self.items().order_by('sheet_category', 'id')
+            .values_list('sheet_category', 'item_name', 'sku', 'quantity', 'price', 'total_value')
+            .iterator(chunk_size=getattr(settings, 'EXPORT_BATCH_ROWS', 10000))
+        )
+        sheet, category, row_number = None, None, 0
+        for item_category, item_name, sku, quantity, price, total_value in rows:
+            if item_category != category or row_number == MAX_SHEET_ROWS - 1:
+                category = item_category
+                sheet = workbook.add_worksheet(sheet_name(category or 'Uncategorized', taken))
+                sheet.set_column(0, 0, 32)
+                sheet.set_column(1, 4, 14)
+                sheet.write_row(0, 0, ITEM_HEADERS, formats['header'])
+                row_number = 0
+            row_number += 1
+            sheet.write_string(row_number, 0, item_name)
+            sheet.write_string(row_number, 1, sku)
+            sheet.write_number(row_number, 2, quantity)
+            sheet.write_number(row_number, 3, float(price), formats['money'])
+            sheet.write_number(row_number, 4, float(total_value), formats['money'])
@@ -0,0 +1,165 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from my_project.db_router import primary_only
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+# Response headers worth replaying along with the body.
+REPLAYED_RESPONSE_HEADERS = ('ETag',)
+
+_stats_lock = threading.Lock()
+_stats = dict.fromkeys(('executed', 'replayed', 'coalesced', 'in_progress', 'mismatched'), 0)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def request_fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps([request.method, request.path, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def replay(entry):
+    response = Response(entry.response_data, status=entry.status_code)
+    for name, value in entry.response_headers.items():
+        response[name] = value
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def lookup(user, key_hash):
+    """Return the live entry for this key, dropping it if it has lapsed.
+
+    An entry lapses when its response is older than IDEMPOTENCY_KEY_TTL,
+    or when it is still unfinished after IDEMPOTENCY_LOCK_TIMEOUT (the
+    request holding it died).
+    """
+    entry = IdempotencyKey.objects.filter(user=user, key_hash=key_hash).first()
+    if entry is None:
+        return None
+    if entry.status_code is None:
+        lifetime = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 30)
+    else:
+        lifetime = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+    if entry.created_at < timezone.now() - timedelta(seconds=lifetime):
+        IdempotencyKey.objects.filter(pk=entry.pk, token=entry.token).delete()
+        return None
+    return entry
+
+
+def claim(user, key_hash, fingerprint, token):
+    """Insert the in-progress entry; False if another request holds the key."""
+    expired = timezone.now() - timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+    IdempotencyKey.objects.filter(created_at__lt=expired).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(user=user, key_hash=key_hash, fingerprint=fingerprint, token=token)
+    except IntegrityError:
+        return False
+    return True
+
+
+def idempotent(view):
+    """Let clients retry a write safely by sending an Idempotency-Key.
+
+    The first request with a key runs the view and its response is stored
+    for IDEMPOTENCY_KEY_TTL seconds; retries with the same key and body
+    get that response back without the view running again. A duplicate
+    that arrives while the first is still running, on any worker, waits
+    for its result. Keys are scoped per user; 5xx responses are not stored
+    so the request can be retried for real.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({
+                'error': 'Invalid idempotency key',
+                'details': 'Idempotency-Key must be at most 255 characters'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        key_hash = hashlib.sha256(key.encode()).hexdigest()
+        fingerprint = request_fingerprint(request)
+        token = uuid.uuid4().hex
+
+        def matching(entry):
+            if entry.fingerprint != fingerprint:
+                _count('mismatched')
+                return Response({
+                    'error': 'Idempotency key reused',
+                    'details': 'This Idempotency-Key was already used for a different request'
+                }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            return replay(entry)
+
+        with primary_only():
+            entry = lookup(user, key_hash)
+            if entry is not None and entry.status_code is not None:
+                _count('replayed')
+                return matching(entry)
+
+            claimed = entry is None and claim(user, key_hash, fingerprint, token)
+            deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 10)
+            while not claimed:
+                if time.monotonic() >= deadline:
+                    _count('in_progress')
+                    return Response({
+                        'error': 'Request in progress',
+                        'details': 'A request with this Idempotency-Key is still being processed'
+                    }, status=status.HTTP_409_CONFLICT)
+                time.sleep(0.05)
+                entry = lookup(user, key_hash)
+                if entry is None:
+                    # The holder gave up without storing a response; this
+                    # request is now free to run it.
+                    claimed = claim(user, key_hash, fingerprint, token)
+                elif entry.status_code is not None:
+                    _count('coalesced')
+                    return matching(entry)
+
+        stored = False
+        try:
+            response = view(request, *args, **kwargs)
+            _count('executed')
+            if response.status_code < 500:
+                headers = {
+                    name: response[name] for name in REPLAYED_RESPONSE_HEADERS if response.has_header(name)
+                }
+                # Matching on the token means a request that outlived its
+                # claim cannot overwrite the entry of the one that took over.
+                stored = IdempotencyKey.objects.filter(user=user, key_hash=key_hash, token=token).update(
+                    status_code=response.status_code, response_data=response.data, response_headers=headers
+                )
+            return response
+        finally:
+            if not stored:
+                IdempotencyKey.objects.filter(user=user, key_hash=key_hash, token=token).delete()
+
+    return wrapper
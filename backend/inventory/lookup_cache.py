@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU mapping with a per-entry TTL.
+
+    The TTL bounds how long an entry written by one worker process can
+    outlive a change made through another process, since invalidation
+    only reaches the local cache.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = dict.fromkeys(('hits', 'misses', 'evictions', 'invalidations'), 0)
+
+    def get_many(self, keys):
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry[1] < now:
+                    self._stats['misses'] += 1
+                    continue
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                found[key] = entry[0]
+        return found
+
+    def set_many(self, mapping):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in mapping.items():
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        stats['max_size'] = self.max_size
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+        return stats
+
+
+item_lookup_cache = LRUCache(
+    max_size=getattr(settings, 'ITEM_LOOKUP_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'ITEM_LOOKUP_CACHE_TTL', 30),
+)
+
+
+def forget_item(item_id, *skus):
+    keys = [('id', item_id)] + [('sku', sku) for sku in skus]
+    transaction.on_commit(lambda: item_lookup_cache.delete_many(keys))
+
+
+def forget_all_items():
+    transaction.on_commit(item_lookup_cache.clear)
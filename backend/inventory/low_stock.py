@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .detail_cache import item_detail_cache
+from .lookup_cache import forget_item
+from .models import CategoryThreshold, InventoryItem
+from .signals import low_stock_changed
+
+# Columns a flag flip writes; callers holding the instance reload these.
+LOW_STOCK_FIELDS = ('is_low_stock', 'version', 'updated_at')
+# Columns _apply evaluates, in the order it unpacks them.
+EVALUATED_FIELDS = ('id', 'sku', 'quantity', 'reorder_threshold', 'category', 'is_low_stock')
+
+
+def is_below(quantity, threshold):
+    return threshold is not None and quantity <= threshold
+
+
+def _apply(rows, category_thresholds):
+    entered, cleared, skus = [], [], {}
+    for pk, sku, quantity, own_threshold, category, flagged in rows:
+        threshold = own_threshold if own_threshold is not None else category_thresholds.get(category or '')
+        low = is_below(quantity, threshold)
+        if low and not flagged:
+            entered.append(pk)
+            skus[pk] = sku
+        elif flagged and not low:
+            cleared.append(pk)
+            skus[pk] = sku
+
+    # A flag flip is a row change like any other: it bumps the version for
+    # If-Match and updated_at for incremental exports.
+    if entered:
+        InventoryItem.objects.filter(id__in=entered).update(
+            is_low_stock=True, version=F('version') + 1, updated_at=timezone.now()
+        )
+    if cleared:
+        InventoryItem.objects.filter(id__in=cleared).update(
+            is_low_stock=False, version=F('version') + 1, updated_at=timezone.now()
+        )
+    if entered or cleared:
+        # Both caches carry is_low_stock and the version clients send back
+        # in If-Match, so both go once the flip commits.
+        for pk, sku in skus.items():
+            forget_item(pk, sku)
+        item_detail_cache.invalidate(*entered, *cleared)
+        transaction.on_commit(lambda: low_stock_changed.send(
+            sender=InventoryItem, entered=entered, cleared=cleared
+        ))
+    return entered, cleared
+
+
+def evaluate_items(item_ids):
+    """Re-evaluate the low-stock flag of just these items.
+
+    Called from the write paths that change quantity, category or a
+    threshold, so the cost scales with the rows written.
+    Returns `(entered, cleared)` item ids.
+    """
+    rows = list(
+        InventoryItem.objects.filter(id__in=item_ids)
+        .values_list(*EVALUATED_FIELDS)
+    )
+    categories = {row[4] or '' for row in rows if row[3] is None}
+    category_thresholds = dict(
+        CategoryThreshold.objects.filter(category__in=categories).values_list('category', 'reorder_threshold')
+    ) if categories else {}
+    return _apply(rows, category_thresholds)
+
+
+def evaluate_category(category):
+    """Re-evaluate the items that inherit `category`'s threshold."""
+    rows = InventoryItem.objects.filter(reorder_threshold__isnull=True)
+    rows = rows.filter(category=category) if category else rows.filter(Q(category='') | Q(category__isnull=True))
+    threshold = CategoryThreshold.objects.filter(category=category).values_list('reorder_threshold', flat=True).first()
+    return _apply(
+        rows.values_list(*EVALUATED_FIELDS),
+        {category: threshold} if threshold is not None else {}
+    )
@@ -0,0 +1,88 @@
+import re
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from inventory.models import InventoryItem, Transaction
+
+
+ADD_DETAILS = re.compile(r'^\+(\d+) units$')
+DELETE_DETAILS = re.compile(r'^Removed SKU (.+)$')
+
+
+class Command(BaseCommand):
+    help = "Fill item_id, user and quantity/value deltas on transactions logged before the ledger columns existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        items_by_sku = {}
+        item_name_counts = Counter()
+        items_by_name = {}
+        for item in InventoryItem.objects.only('id', 'sku', 'item_name', 'price', 'category').iterator(chunk_size=batch_size):
+            items_by_sku[item.sku] = item
+            item_name_counts[item.item_name] += 1
+            items_by_name[item.item_name] = item
+
+        users_by_name = {}
+        user_name_counts = Counter()
+        for user in User.objects.only('id', 'username', 'first_name').iterator(chunk_size=batch_size):
+            for name in {user.username, user.first_name}:
+                if name:
+                    user_name_counts[name] += 1
+                    users_by_name[name] = user.id
+
+        pending = Transaction.objects.filter(item_id__isnull=True).order_by('id')
+        scanned = updated = 0
+        last_id = 0
+
+        while True:
+            batch = list(pending.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            changed = []
+
+            for txn in batch:
+                scanned += 1
+                item = None
+                match = DELETE_DETAILS.match(txn.details)
+                if match:
+                    item = items_by_sku.get(match.group(1))
+                elif item_name_counts[txn.item_name] == 1:
+                    item = items_by_name[txn.item_name]
+
+                if item is None:
+                    continue
+
+                txn.item_id = item.id
+                txn.category = item.category or ''
+                if txn.user_id is None and user_name_counts[txn.user_name] == 1:
+                    txn.user_id = users_by_name[txn.user_name]
+
+                # Only "add" rows carry a parseable quantity; the value is
+                # priced at the item's current price as the best estimate.
+                match = ADD_DETAILS.match(txn.details)
+                if txn.transaction_type == 'add' and match:
+                    txn.quantity_delta = int(match.group(1))
+                    txn.value_delta = item.price * txn.quantity_delta
+                    txn.item_count_delta = 1
+
+                changed.append(txn)
+
+            if changed and not dry_run:
+                Transaction.objects.bulk_update(
+                    changed, ['item_id', 'user', 'quantity_delta', 'value_delta', 'category', 'item_count_delta']
+                )
+            updated += len(changed)
+
+        prefix = "[dry run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Scanned {scanned} transactions, backfilled {updated}."
+        ))
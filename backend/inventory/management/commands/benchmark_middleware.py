@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from rest_framework.authtoken.models import Token
+
+
+class Command(BaseCommand):
+    help = "Compare per-request CPU time of an API endpoint with the full and the lean middleware stack."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/auth/profile/')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def measure(self, client, path, count):
+        started = time.process_time()
+        for _ in range(count):
+            response = client.get(path)
+        elapsed = (time.process_time() - started) / count
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+        return elapsed
+
+    def handle(self, *args, **options):
+        path = options['path']
+        lean_paths = getattr(settings, 'LEAN_MIDDLEWARE_PATHS', []) or ['/api/']
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '') and not host.startswith('.')), 'localhost')
+
+        # The benchmark user and token are rolled back afterwards.
+        with transaction.atomic():
+            user = User.objects.create_user(username='middleware-benchmark')
+            client = Client(HTTP_HOST=host)
+            # Authenticate like the frontend does: auth cookie, plus the
+            # csrftoken a browser picks up from the admin.
+            client.cookies[getattr(settings, 'AUTH_COOKIE_NAME', 'auth_token')] = Token.objects.create(user=user).key
+            client.cookies[settings.CSRF_COOKIE_NAME] = 'x' * 32
+
+            full, lean = [], []
+            with override_settings(LEAN_MIDDLEWARE_PATHS=[]):
+                self.measure(client, path, 20)
+            for _ in range(options['rounds']):
+                with override_settings(LEAN_MIDDLEWARE_PATHS=[]):
+                    full.append(self.measure(client, path, options['requests']))
+                with override_settings(LEAN_MIDDLEWARE_PATHS=lean_paths):
+                    lean.append(self.measure(client, path, options['requests']))
+            transaction.set_rollback(True)
+
+        # Best round of each: scheduling noise only ever adds time.
+        full_ms, lean_ms = min(full) * 1000, min(lean) * 1000
+        self.stdout.write(
+            f"{path}: full stack {full_ms:.3f} ms/request, lean {lean_ms:.3f} ms/request, "
+            f"saved {full_ms - lean_ms:.3f} ms ({(full_ms - lean_ms) / full_ms:.0%})"
+        )
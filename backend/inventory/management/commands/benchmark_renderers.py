@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from inventory.models import InventoryItem, Transaction
+from inventory.serializers import InventoryItemSerializer, TransactionSerializer
+from my_project.renderers import ORJSONRenderer
+
+
+def sample_items(count):
+    now = timezone.now()
+    return [
+        InventoryItem(
+            id=i, sku=f'SKU{i:06d}', item_name=f'Item {i}', quantity=i % 500,
+            category='Electronics', price=Decimal('19.99') + i,
+            created_at=now - timedelta(minutes=i), updated_at=now
+        )
+        for i in range(count)
+    ]
+
+
+def sample_transactions(count):
+    now = timezone.now()
+    return [
+        Transaction(
+            id=i, transaction_type='update', item_name=f'Item {i}', item_id=i,
+            user_name='manager', details='Updated', quantity_delta=-1,
+            value_delta=Decimal('-19.99'), category='Electronics',
+            created_at=now - timedelta(minutes=i)
+        )
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare CPU time per page of the stdlib JSON renderer and the orjson renderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def measure(self, renderer, data, iterations):
+        started = time.process_time()
+        for _ in range(iterations):
+            renderer.render(data)
+        return (time.process_time() - started) / iterations
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        iterations = options['iterations']
+        pages = {
+            'InventoryItemListView': InventoryItemSerializer(sample_items(page_size), many=True).data,
+            'TransactionListView': TransactionSerializer(sample_transactions(page_size), many=True).data,
+        }
+
+        for view, rows in pages.items():
+            data = {'next': None, 'previous': None, 'results': rows}
+            stdlib = self.measure(JSONRenderer(), data, iterations)
+            fast = self.measure(ORJSONRenderer(), data, iterations)
+            self.stdout.write(
+                f"{view} ({page_size} rows/page): stdlib {stdlib * 1000:.3f} ms, "
+                f"orjson {fast * 1000:.3f} ms, saved {(stdlib - fast) * 1000:.3f} ms/page "
+                f"({stdlib / fast if fast else float('inf'):.1f}x)"
+            )
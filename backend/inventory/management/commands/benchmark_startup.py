@@ -0,0 +1,29 @@
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from my_project.startup import eager_lazy_imports, measure_startup
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start import time and peak RSS of the WSGI and ASGI entry points."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument(
+            '--entry-point', action='append', dest='entry_points',
+            help="Module to import (default: my_project.wsgi and my_project.asgi)."
+        )
+
+    def handle(self, *args, **options):
+        for entry_point in options['entry_points'] or ['my_project.wsgi', 'my_project.asgi']:
+            runs = [measure_startup(entry_point) for _ in range(options['runs'])]
+            seconds = statistics.median(run['seconds'] for run in runs)
+            rss_mb = statistics.median(run['max_rss_kb'] for run in runs) / 1024
+            self.stdout.write(
+                f"{entry_point}: {seconds * 1000:.0f} ms median import, {rss_mb:.1f} MiB peak RSS, "
+                f"{len(runs[-1]['modules'])} modules"
+            )
+            eager = eager_lazy_imports(runs[-1]['modules'])
+            if eager:
+                self.stdout.write(self.style.WARNING(f"  loaded at startup: {', '.join(eager)}"))
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.models import SupplierDeletionJob
+from inventory.supplier_deletion import ACTIVE_STATUSES, run_job
+
+
+class Command(BaseCommand):
+    help = "Finish supplier deletion jobs interrupted by a restart (or rerun a failed one)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, help="Only run this job id, whatever its status.")
+        parser.add_argument(
+            '--stale-seconds', type=int, default=300,
+            help="Skip active jobs that made progress more recently than this."
+        )
+
+    def handle(self, *args, **options):
+        if options['job']:
+            jobs = SupplierDeletionJob.objects.filter(pk=options['job']).exclude(status='completed')
+        else:
+            cutoff = timezone.now() - timedelta(seconds=options['stale_seconds'])
+            jobs = SupplierDeletionJob.objects.filter(status__in=ACTIVE_STATUSES, updated_at__lt=cutoff)
+
+        job_ids = list(jobs.order_by('created_at').values_list('pk', flat=True))
+        if not job_ids:
+            self.stdout.write("No supplier deletion jobs to resume.")
+            return
+
+        for job_id in job_ids:
+            job = run_job(job_id)
+            message = f"Job {job.pk} ({job.supplier_name}): {job.status}, {job.deleted_items} items deleted."
+            if job.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(message))
+            else:
+                self.stdout.write(self.style.ERROR(f"{message} {job.error}"))
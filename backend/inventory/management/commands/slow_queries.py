@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.models import SlowQuery
+from my_project.slow_queries import top_fingerprints
+
+
+class Command(BaseCommand):
+    help = "Browse the slow query log: recent entries, the costliest query shapes, or one entry's plan."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--top', action='store_true', help="Group by query shape, ranked by total time.")
+        parser.add_argument('--id', type=int, help="Show one entry with its parameters and EXPLAIN plan.")
+        parser.add_argument('--view', help="Only entries whose view name contains this.")
+        parser.add_argument('--purge-days', type=int, help="Delete entries older than this many days and exit.")
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['purge_days'])
+            deleted, _ = SlowQuery.objects.filter(created_at__lt=cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} slow queries."))
+            return
+
+        if options['id']:
+            self.show(options['id'])
+            return
+
+        queryset = SlowQuery.objects.all()
+        if options['view']:
+            queryset = queryset.filter(view_name__icontains=options['view'])
+
+        if options['top']:
+            for group in top_fingerprints(queryset, options['limit']):
+                self.stdout.write(
+                    f"{group['total_ms']:10.1f} ms total  {group['calls']:5d} calls  "
+                    f"avg {group['avg_ms']:.1f}  max {group['max_ms']:.1f}  {group['view_name'] or '-'}"
+                )
+                self.stdout.write(f"    {group['sql'][:200]}")
+            return
+
+        for slow_query in queryset.defer('plan')[:options['limit']]:
+            self.stdout.write(
+                f"#{slow_query.pk}  {slow_query.created_at:%Y-%m-%d %H:%M:%S}  {slow_query.duration_ms:8.1f} ms  "
+                f"{slow_query.view_name or '-'}  plan: {slow_query.plan_status}"
+            )
+            self.stdout.write(f"    {slow_query.sql[:200]}")
+
+    def show(self, query_id):
+        slow_query = SlowQuery.objects.filter(pk=query_id).first()
+        if slow_query is None:
+            raise CommandError(f"No slow query {query_id}")
+        self.stdout.write(f"#{slow_query.pk}  {slow_query.duration_ms:.1f} ms  {slow_query.alias}")
+        self.stdout.write(f"View: {slow_query.view_name or '-'}  Path: {slow_query.path or '-'}")
+        self.stdout.write(f"SQL: {slow_query.sql}")
+        self.stdout.write(f"Params: {slow_query.params or '-'}")
+        self.stdout.write(f"Plan ({slow_query.plan_status}):")
+        self.stdout.write(slow_query.plan or '-')
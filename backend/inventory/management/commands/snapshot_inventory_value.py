@@ -0,0 +1,40 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.snapshots import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Record daily per-category inventory valuation snapshots up to a date (default: yesterday)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Last day to snapshot, YYYY-MM-DD.")
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help="Discard the snapshot for --date and reseed it from the items table."
+        )
+        parser.add_argument(
+            '--reconcile', action='store_true',
+            help="Check the last day written against the items table and reseed it on drift "
+                 "(scans the whole table; schedule it weekly, not nightly)."
+        )
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                through_day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format")
+        else:
+            through_day = timezone.localdate() - timedelta(days=1)
+
+        written = take_snapshots(through_day, rebuild=options['rebuild'], reconcile_last=options['reconcile'])
+
+        if written:
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote snapshots for {written[0]} to {written[-1]} ({len(written)} days)."
+            ))
+        else:
+            self.stdout.write(f"Snapshot for {through_day} already exists.")
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:11
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0008_transaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='item_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='quantity_delta',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='value_delta',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['item_id', 'created_at'], name='txn_item_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_at'], name='txn_created_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_transaction_ledger_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(blank=True, default='', max_length=100)),
+                ('total_value', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('item_count', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['date', 'category'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='category',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='item_count_delta',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorysnapshot',
+            constraint=models.UniqueConstraint(fields=('date', 'category'), name='unique_snapshot_date_category'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_inventory_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_supplier_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryThreshold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100, unique=True)),
+                ('reorder_threshold', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='is_low_stock',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='reorder_threshold',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('is_low_stock', True)), fields=['created_at'], name='item_low_stock_idx'),
+        ),
+    ]
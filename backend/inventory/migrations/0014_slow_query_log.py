@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_low_stock_thresholds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sql', models.TextField()),
+                ('params', models.TextField(blank=True)),
+                ('fingerprint', models.CharField(db_index=True, max_length=40)),
+                ('duration_ms', models.FloatField()),
+                ('alias', models.CharField(default='default', max_length=50)),
+                ('view_name', models.CharField(blank=True, max_length=255)),
+                ('path', models.CharField(blank=True, max_length=500)),
+                ('plan', models.TextField(blank=True)),
+                ('plan_status', models.CharField(choices=[('pending', 'Pending'), ('captured', 'Captured'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
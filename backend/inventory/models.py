@@ -1,6 +1,8 @@
 from django.db import models
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from decimal import Decimal
 
 
@@ -11,6 +13,8 @@ class Supplier(models.Model):
     address = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped on every write; served as the ETag for If-Match updates.
+    version = models.PositiveIntegerField(default=1)
     
     def __str__(self):
         return self.name
@@ -36,6 +40,18 @@ class InventoryItem(models.Model):
     supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+    # Falls back to the category's threshold when unset.
+    reorder_threshold = models.PositiveIntegerField(null=True, blank=True)
+    # Maintained by inventory.low_stock whenever quantity or a threshold changes.
+    is_low_stock = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['created_at'], condition=models.Q(is_low_stock=True), name='item_low_stock_idx'
+            ),
+        ]
     
     def clean(self):
         if not self.sku:
@@ -48,6 +64,15 @@ class InventoryItem(models.Model):
     def __str__(self):
         return f"{self.sku} - {self.item_name}"
     
+class CategoryThreshold(models.Model):
+    category = models.CharField(max_length=100, unique=True)
+    reorder_threshold = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.category}: {self.reorder_threshold}"
+
+
 class Transaction(models.Model):
     TRANSACTION_TYPES = [
         ('add', 'Add'),
@@ -59,10 +84,133 @@ class Transaction(models.Model):
     item_name = models.CharField(max_length=255) 
     user_name = models.CharField(max_length=255)  
     details = models.CharField(max_length=500, blank=True) 
+    # Structured ledger columns. item_id is a plain integer rather than a
+    # foreign key so movement history survives the item being deleted.
+    item_id = models.BigIntegerField(null=True, blank=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    quantity_delta = models.IntegerField(default=0)
+    value_delta = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    # Category the deltas apply to and the change in that category's item
+    # count, so valuation snapshots can be rolled forward from the ledger.
+    category = models.CharField(max_length=100, blank=True, default='')
+    item_count_delta = models.SmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['item_id', 'created_at'], name='txn_item_created_idx'),
+            models.Index(fields=['created_at'], name='txn_created_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.item_name} by {self.user_name}"    
\ No newline at end of file
+        return f"{self.item_name} by {self.user_name}"
+
+
+class InventorySnapshot(models.Model):
+    date = models.DateField()
+    category = models.CharField(max_length=100, blank=True, default='')
+    total_value = models.DecimalField(max_digits=20, decimal_places=2)
+    item_count = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['date', 'category']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'category'], name='unique_snapshot_date_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.category or 'Uncategorized'}: {self.total_value}"
+
+
+class SupplierDeletionJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    # Not a foreign key: the job outlives the supplier it deletes.
+    supplier_id = models.BigIntegerField()
+    supplier_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    total_items = models.IntegerField(default=0)
+    deleted_items = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['supplier_id', 'status'], name='supplier_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Delete {self.supplier_name} ({self.status})"
+
+
+class SlowQuery(models.Model):
+    PLAN_STATUSES = [
+        ('pending', 'Pending'),
+        ('captured', 'Captured'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    # Hash of the statement with literals stripped, to group repeats.
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    duration_ms = models.FloatField()
+    alias = models.CharField(max_length=50, default='default')
+    view_name = models.CharField(max_length=255, blank=True)
+    path = models.CharField(max_length=500, blank=True)
+    plan = models.TextField(blank=True)
+    plan_status = models.CharField(max_length=10, choices=PLAN_STATUSES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f} ms in {self.view_name or 'unknown view'}"
+
+
+class DataVersion(models.Model):
+    """Single-row counter bumped after each committed inventory write.
+
+    Lives in the database so every worker sees the same version; the
+    report caches key their entries by it.
+    """
+    version = models.BigIntegerField()
+
+
+class IdempotencyKey(models.Model):
+    """A write sent with an Idempotency-Key and, once finished, its response.
+
+    The unique (user, key_hash) row is the claim: whichever worker inserts
+    it runs the view, and every other worker replays or waits for it.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key_hash = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64)
+    # Identifies the request holding the claim, so only it stores or drops it.
+    token = models.CharField(max_length=32)
+    # Null while the request is still running.
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    response_headers = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key_hash'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key_hash[:12]} ({self.status_code or 'in progress'})"
@@ -0,0 +1,172 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from my_project.db_router import choose_read_alias, primary_only, reads_from
+from .models import DataVersion
+
+
+def get_data_version():
+    """The data version as seen by the database reads currently go to.
+
+    The bump commits with or after the data it covers, so a replica never
+    reports a version ahead of its own rows.
+    """
+    version = DataVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    if version is None:
+        # A fresh clock-based stamp can never collide with a version
+        # that per-process entries are already tagged with.
+        with primary_only():
+            version = DataVersion.objects.get_or_create(pk=1, defaults={'version': time.time_ns()})[0].version
+    return version
+
+
+def bump_data_version():
+    if not DataVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        get_data_version()
+
+
+def data_changed():
+    transaction.on_commit(bump_data_version)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Return `(result, shared)`; `shared` is True when the result came
+        from a call another thread was already running."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class ReportCache:
+    """Per-process cache for expensive report payloads.
+
+    Entries are tagged with the data version they were computed at. A
+    matching version is a hit; an entry for an older version is served
+    stale (for up to REPORT_CACHE_MAX_STALE seconds after it was computed)
+    while one background thread recomputes it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._refreshing = set()
+        self._flight = SingleFlight()
+        self._stats = dict.fromkeys(
+            ('hits', 'misses', 'coalesced', 'stale', 'refreshes', 'errors'), 0
+        )
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _compute(self, name, alias, version, compute):
+        try:
+            # Read the data where the version came from, or a replica
+            # behind it would be cached as current.
+            with reads_from(alias):
+                value = compute()
+        except Exception:
+            self._count('errors')
+            raise
+        with self._lock:
+            current = self._entries.get(name)
+            if current is None or current[0] < version:
+                self._entries[name] = (version, value, time.monotonic())
+        return value
+
+    def _refresh(self, name, alias, version, compute):
+        try:
+            self._flight.do((name, version), lambda: self._compute(name, alias, version, compute))
+            self._count('refreshes')
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+            connection.close()
+
+    def _refresh_in_background(self, name, alias, version, compute):
+        with self._lock:
+            if name in self._refreshing:
+                return
+            self._refreshing.add(name)
+        threading.Thread(target=self._refresh, args=(name, alias, version, compute), daemon=True).start()
+
+    def get(self, name, compute):
+        # One database for the version and the data: a replica, unless the
+        # request is pinned to the primary after a write.
+        alias = choose_read_alias()
+        with reads_from(alias):
+            version = get_data_version()
+        entry = self._entries.get(name)
+
+        if entry is not None:
+            entry_version, value, stored_at = entry
+            # A replica further behind than the one the entry came from
+            # reports an older version; the entry is still current for it.
+            if entry_version >= version:
+                self._count('hits')
+                return value
+            max_stale = getattr(settings, 'REPORT_CACHE_MAX_STALE', 30)
+            if time.monotonic() - stored_at <= max_stale:
+                self._count('stale')
+                self._refresh_in_background(name, alias, version, compute)
+                return value
+
+        self._count('misses')
+        value, shared = self._flight.do((name, version), lambda: self._compute(name, alias, version, compute))
+        if shared:
+            self._count('coalesced')
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['stale'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale']) / lookups, 3) if lookups else None
+        return stats
+
+
+report_cache = ReportCache()
@@ -1,14 +1,27 @@
 from rest_framework import serializers
-from .models import InventoryItem, Supplier,Transaction
+from .models import InventoryItem, Supplier,Transaction,SupplierDeletionJob,SlowQuery
+from .transaction_feed import TimestampFormatter, type_label
 from decimal import Decimal
-import pytz
 
-class SupplierSerializer(serializers.ModelSerializer):
+
+class SparseFieldsetMixin:
+    """Only render the field names passed as `fields`; all fields otherwise."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SupplierSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     linked_items = serializers.SerializerMethodField()
     
     class Meta:
         model = Supplier
-        fields = ['id', 'name', 'email', 'phone', 'address', 'linked_items', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'email', 'phone', 'address', 'linked_items', 'created_at', 'updated_at', 'version']
+        read_only_fields = ['version']
 
     def get_linked_items(self, obj):
         return obj.inventoryitem_set.count()
@@ -29,14 +42,16 @@ class SupplierSerializer(serializers.ModelSerializer):
         return value.strip()
 
 
-class InventoryItemSerializer(serializers.ModelSerializer):
+class InventoryItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = InventoryItem
         fields = "__all__"
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'version', 'is_low_stock']
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
+        if 'supplier' not in data:
+            return data
         try:
             if instance.supplier:
                 data['supplier'] = instance.supplier.name
@@ -68,15 +83,42 @@ class InventoryItemSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Price must be greater than or equal to 0.")
         return value
 
-class TransactionSerializer(serializers.ModelSerializer):
-    transaction_type_display = serializers.CharField(source='get_transaction_type_display', read_only=True)
+class TransactionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    transaction_type_display = serializers.SerializerMethodField()
     formatted_date = serializers.SerializerMethodField()
     
     class Meta:
         model = Transaction
         fields = "__all__"
 
+    def get_transaction_type_display(self, obj):
+        return type_label(obj.transaction_type)
+
     def get_formatted_date(self, obj):
-        ist_timezone = pytz.timezone('Asia/Kolkata')
-        local_time = obj.created_at.astimezone(ist_timezone)
-        return local_time.strftime('%Y-%m-%d %H:%M')
\ No newline at end of file
+        # With many=True this serializer renders every row, so the
+        # formatter's per-minute cache spans the page.
+        if not hasattr(self, '_format_date'):
+            self._format_date = TimestampFormatter()
+        return self._format_date(obj.created_at)
+
+
+class SupplierDeletionJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SupplierDeletionJob
+        fields = ['id', 'supplier_id', 'supplier_name', 'status', 'total_items', 'deleted_items',
+                  'progress', 'error', 'created_at', 'updated_at', 'finished_at']
+
+    def get_progress(self, obj):
+        if obj.status == 'completed':
+            return 100
+        if not obj.total_items:
+            return 0
+        return min(99, obj.deleted_items * 100 // obj.total_items)
+
+
+class SlowQuerySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SlowQuery
+        fields = "__all__"
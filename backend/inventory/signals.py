@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by inventory.low_stock after the write that changed the flags
+# commits, with `entered` and `cleared` lists of item ids. Connect a
+# receiver to push alerts (email, webhook, ...).
+low_stock_changed = Signal()
@@ -0,0 +1,173 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import InventoryItem, InventorySnapshot, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def empty_totals():
+    return defaultdict(lambda: [Decimal('0.00'), 0])
+
+
+def current_totals():
+    totals = empty_totals()
+    rows = InventoryItem.objects.values('category').annotate(
+        value=Sum(F('price') * F('quantity')),
+        count=Count('id')
+    )
+    for row in rows:
+        entry = totals[row['category'] or '']
+        entry[0] += row['value'] or 0
+        entry[1] += row['count']
+    return totals
+
+
+def seed_totals(day):
+    """Reconstruct the end-of-day totals for `day` from the live items
+    table by rewinding every ledger row written after that day."""
+    totals = current_totals()
+    later = (
+        Transaction.objects.filter(created_at__gte=day_start(day + timedelta(days=1)))
+        .values('category')
+        .annotate(value=Sum('value_delta'), count=Sum('item_count_delta'))
+        .order_by()
+    )
+    for row in later:
+        entry = totals[row['category']]
+        entry[0] -= row['value'] or 0
+        entry[1] -= row['count'] or 0
+    return totals
+
+
+def daily_deltas(first_day, last_day):
+    rows = (
+        Transaction.objects.filter(
+            created_at__gte=day_start(first_day),
+            created_at__lt=day_start(last_day + timedelta(days=1))
+        )
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'category')
+        .annotate(value=Sum('value_delta'), count=Sum('item_count_delta'))
+        .order_by()
+    )
+    deltas = defaultdict(list)
+    for row in rows:
+        deltas[row['day']].append(row)
+    return deltas
+
+
+def nonzero(totals):
+    return {category: tuple(entry) for category, entry in totals.items() if entry[0] or entry[1]}
+
+
+def reconcile(day, totals):
+    """The totals for `day` recomputed from the items table.
+
+    Rolling forward is only as good as the ledger: a write that records
+    no deltas (an edit in the Django admin, a raw UPDATE) drifts every
+    later day. A reconciling run (periodic, not nightly: it scans the
+    whole items table) reseeds its newest snapshot and logs any drift
+    from the rolled-forward figures.
+    """
+    seeded = seed_totals(day)
+    rolled, fresh = nonzero(totals), nonzero(seeded)
+    drift = {
+        category: (rolled.get(category), fresh.get(category))
+        for category in set(rolled) | set(fresh)
+        if rolled.get(category) != fresh.get(category)
+    }
+    if drift:
+        logger.warning("Snapshot for %s drifted from the items table, reseeded: %s", day, drift)
+    return seeded
+
+
+def write_snapshot(day, totals):
+    InventorySnapshot.objects.bulk_create([
+        InventorySnapshot(date=day, category=category, total_value=value, item_count=count)
+        for category, (value, count) in totals.items()
+        if count or value
+    ])
+
+
+def take_snapshots(through_day, rebuild=False, reconcile_last=False):
+    """Write snapshots up to and including `through_day`.
+
+    Each missing day is rolled forward from the previous snapshot plus that
+    day's ledger deltas; with `reconcile_last`, `through_day` itself is
+    then reconciled against the items table. Without a previous snapshot
+    (or with `rebuild`) the day is seeded from the items table instead.
+    Returns the dates written.
+    """
+    with transaction.atomic():
+        if rebuild:
+            InventorySnapshot.objects.filter(date=through_day).delete()
+
+        last_day = (
+            InventorySnapshot.objects.filter(date__lte=through_day)
+            .order_by('-date')
+            .values_list('date', flat=True)
+            .first()
+        )
+        if last_day == through_day:
+            return []
+
+        if last_day is None:
+            write_snapshot(through_day, seed_totals(through_day))
+            return [through_day]
+
+        totals = empty_totals()
+        for snapshot in InventorySnapshot.objects.filter(date=last_day):
+            totals[snapshot.category] = [snapshot.total_value, snapshot.item_count]
+
+        first_day = last_day + timedelta(days=1)
+        deltas = daily_deltas(first_day, through_day)
+        written = []
+        day = first_day
+        while day <= through_day:
+            for row in deltas.get(day, []):
+                entry = totals[row['category']]
+                entry[0] += row['value'] or 0
+                entry[1] += row['count'] or 0
+            if reconcile_last and day == through_day:
+                totals = reconcile(day, totals)
+            write_snapshot(day, totals)
+            written.append(day)
+            day += timedelta(days=1)
+        return written
+
+
+def trend(start, end, category=None):
+    snapshots = InventorySnapshot.objects.filter(date__gte=start, date__lte=end)
+    if category is not None:
+        snapshots = snapshots.filter(category__iexact=category)
+
+    points = {}
+    for date, name, value, count in snapshots.values_list('date', 'category', 'total_value', 'item_count'):
+        point = points.setdefault(date, {
+            'date': date.isoformat(),
+            'total_value': Decimal('0.00'),
+            'item_count': 0,
+            'categories': {}
+        })
+        point['total_value'] += value
+        point['item_count'] += count
+        point['categories'][name or 'Uncategorized'] = {
+            'value': round(float(value), 2),
+            'count': count
+        }
+
+    for point in points.values():
+        point['total_value'] = round(float(point['total_value']), 2)
+    return [points[date] for date in sorted(points)]
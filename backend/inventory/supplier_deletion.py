@@ -0,0 +1,121 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from my_project.db_router import primary_only
+from .bulk import ROW_FIELDS, delete_item_rows
+from .cache_invalidation import supplier_changed
+from .models import InventoryItem, Supplier, SupplierDeletionJob
+from .report_cache import data_changed
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+def schedule_supplier_deletion(supplier, user):
+    """Queue a deletion job for `supplier`, or return the one already queued."""
+    with transaction.atomic():
+        job = SupplierDeletionJob.objects.filter(supplier_id=supplier.pk, status__in=ACTIVE_STATUSES).first()
+        if job is not None:
+            return job
+        job = SupplierDeletionJob.objects.create(
+            supplier_id=supplier.pk,
+            supplier_name=supplier.name,
+            total_items=InventoryItem.objects.filter(supplier_id=supplier.pk).count(),
+            requested_by=user,
+        )
+        transaction.on_commit(lambda: start_job(job.pk))
+    return job
+
+
+def start_job(job_id):
+    if getattr(settings, 'SUPPLIER_DELETION_IN_BACKGROUND', True):
+        threading.Thread(target=_run_in_thread, args=(job_id,), daemon=True).start()
+    else:
+        run_job(job_id)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connection.close()
+
+
+def _delete_batch(job, user_name, batch_size):
+    with transaction.atomic():
+        rows = list(
+            InventoryItem.objects
+            .filter(supplier_id=job.supplier_id)
+            .select_for_update()
+            .order_by('id')
+            .values(*ROW_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        delete_item_rows(
+            rows, job.requested_by_id, user_name,
+            lambda row: f"Removed SKU {row['sku']} with supplier {job.supplier_name}"
+        )
+        SupplierDeletionJob.objects.filter(pk=job.pk).update(
+            deleted_items=F('deleted_items') + len(rows), updated_at=timezone.now()
+        )
+    return len(rows)
+
+
+def _delete_supplier(job):
+    """Delete the supplier, unless items still (or newly) reference it.
+
+    The supplier row is locked first, which blocks new items from being
+    pointed at it; anything left would otherwise be cascade-deleted
+    without ledger rows.
+    """
+    with transaction.atomic():
+        list(Supplier.objects.select_for_update().filter(pk=job.supplier_id).values_list('pk'))
+        if InventoryItem.objects.filter(supplier_id=job.supplier_id).exists():
+            return False
+        Supplier.objects.filter(pk=job.supplier_id).delete()
+        SupplierDeletionJob.objects.filter(pk=job.pk).update(
+            status='completed', finished_at=timezone.now(), updated_at=timezone.now()
+        )
+        data_changed()
+        supplier_changed(job.supplier_id)
+    return True
+
+
+def run_job(job_id):
+    """Delete the job's supplier's items in batches, then the supplier.
+
+    Each batch commits on its own, with its ledger rows and progress, so
+    no long transaction is held and an interrupted job can be resumed.
+    Runs against the primary throughout: it is usually started in a
+    fresh thread, which does not inherit the request's pin.
+    """
+    with primary_only():
+        job = SupplierDeletionJob.objects.select_related('requested_by').get(pk=job_id)
+        SupplierDeletionJob.objects.filter(pk=job.pk).update(status='running', error='', updated_at=timezone.now())
+
+        user = job.requested_by
+        user_name = (user.first_name or user.username) if user else 'system'
+        batch_size = getattr(settings, 'SUPPLIER_DELETE_BATCH_SIZE', 500)
+
+        try:
+            while True:
+                while _delete_batch(job, user_name, batch_size):
+                    pass
+                if _delete_supplier(job):
+                    break
+        except Exception as e:
+            logger.exception("Supplier deletion job %s failed", job.pk)
+            SupplierDeletionJob.objects.filter(pk=job.pk).update(
+                status='failed', error=str(e), updated_at=timezone.now()
+            )
+
+        job.refresh_from_db()
+    return job
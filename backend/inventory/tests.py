@@ -1,9 +1,59 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, QuerySet, Sum
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse, StreamingHttpResponse
 from django.contrib.auth.models import User
+from django.core.cache import caches
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from .models import InventoryItem
+from .models import (
+    InventoryItem, Supplier, Transaction, InventorySnapshot, SupplierDeletionJob, SlowQuery, DataVersion,
+    IdempotencyKey, CategoryThreshold
+)
+from . import analytics
+from .snapshots import take_snapshots
+from .detail_cache import DetailCache
+from . import supplier_deletion
+from .bulk import bulk_update_items
+from .low_stock import evaluate_category
+from .report_cache import ReportCache, report_cache, SingleFlight, get_data_version
+from .lookup_cache import item_lookup_cache
+from .signals import low_stock_changed
+from .export_backends import loaded_backends
+from .export_backends.xlsx_report import sheet_name as xlsx_sheet_name
+from .transaction_feed import TimestampFormatter, csv_lines
+from my_project.db_router import ReplicaRouter, is_pinned_to_primary, primary_only
+from my_project.middleware import (
+    ReplicaPinningMiddleware, CompressionMiddleware, negotiate_encoding, available_encodings
+)
+from my_project.pooled_postgresql.pool import ConnectionPool, PoolTimeout
+from my_project.pooled_postgresql.base import DatabaseWrapper as PooledDatabaseWrapper
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+from my_project import renderers, slow_queries
+from my_project.startup import eager_lazy_imports, measure_startup
+from my_project.renderers import ORJSONRenderer, ORJSONParser, MessagePackRenderer, MessagePackParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.exceptions import ParseError
+from datetime import timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.utils import timezone
+import numpy as np
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from unittest import mock, skipUnless
 
 
 class InventoryItemAPITest(APITestCase):
@@ -91,4 +141,1323 @@ class InventoryItemAPITest(APITestCase):
         response = self.client.post(self.url, data)
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(response.data['sku'], 'L004')
\ No newline at end of file
+        self.assertEqual(response.data['sku'], 'L004')
+
+
+class TransactionLedgerTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='ledgeruser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.item = InventoryItem.objects.create(
+            sku='LG001', item_name='Ledger Item', quantity=10, price=Decimal('2.50')
+        )
+
+    def test_add_records_deltas(self):
+        data = {'sku': 'LG002', 'item_name': 'New', 'quantity': 4, 'price': '5.00'}
+        response = self.client.post('/api/inventory/add/', data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        txn = Transaction.objects.get(transaction_type='add')
+        self.assertEqual(txn.item_id, response.data['id'])
+        self.assertEqual(txn.user, self.user)
+        self.assertEqual(txn.quantity_delta, 4)
+        self.assertEqual(txn.value_delta, Decimal('20.00'))
+
+    def test_update_records_net_change(self):
+        url = f'/api/inventory/{self.item.id}/update/'
+        response = self.client.patch(url, {'quantity': 6, 'price': '3.00'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        txn = Transaction.objects.get(transaction_type='update')
+        self.assertEqual(txn.item_id, self.item.id)
+        self.assertEqual(txn.quantity_delta, -4)
+        self.assertEqual(txn.value_delta, Decimal('-7.00'))
+
+
+class InventoryAnalyticsTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='analyticsuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_compute_metrics(self):
+        items = np.array(
+            [(1, 100, 10.0), (2, 5, 1.0), (3, 50, 2.0)], dtype=analytics.ITEM_DTYPE
+        )
+        demand = np.array(
+            [(1, 4.0), (1, 4.0), (2, 15.0), (3, 2.5), (99, 5.0)], dtype=analytics.DEMAND_DTYPE
+        )
+        metrics = analytics.compute_metrics(items, demand, 10, 2, 0.0, (0.8, 0.95))
+
+        self.assertEqual(metrics['avg_daily_demand'].tolist(), [0.8, 1.5, 0.25])
+        self.assertEqual(metrics['reorder_point'].tolist(), [2, 3, 1])
+        self.assertEqual(metrics['days_of_cover'][0], 125.0)
+        self.assertEqual(metrics['abc_class'].tolist(), [0, 1, 2])
+
+    def test_analytics_endpoint(self):
+        InventoryItem.objects.create(sku='AN001', item_name='Widget', quantity=3, price=Decimal('1.00'))
+        response = self.client.get('/api/inventory/reports/analytics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary']['total_skus'], 1)
+        self.assertEqual(response.data['items'][0]['sku'], 'AN001')
+
+    def test_analytics_follow_data_version(self):
+        report_cache.clear()
+        InventoryItem.objects.create(sku='AN002', item_name='Gear', quantity=3, price=Decimal('1.00'))
+        self.assertEqual(self.client.get('/api/inventory/reports/analytics/').data['summary']['total_skus'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/inventory/add/', {
+                'sku': 'AN003', 'item_name': 'Cog', 'quantity': 1, 'price': '2.00', 'category': 'Parts'
+            })
+        with override_settings(REPORT_CACHE_MAX_STALE=0):
+            response = self.client.get('/api/inventory/reports/analytics/', {'limit': -1})
+        self.assertEqual(response.data['summary']['total_skus'], 2)
+        self.assertEqual(len(response.data['items']), 1)
+
+
+class InventorySnapshotTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='snapshotuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.item = InventoryItem.objects.create(
+            sku='SN001', item_name='Rake', quantity=2, price=Decimal('5.00'), category='Tools'
+        )
+
+    def test_roll_forward_from_previous_snapshot(self):
+        url = f'/api/inventory/{self.item.id}/update/'
+        self.client.patch(url, {'quantity': 4})
+        self.client.patch(url, {'category': 'Garden'})
+
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        self.assertEqual(take_snapshots(yesterday), [yesterday])
+        self.assertEqual(take_snapshots(today), [today])
+
+        seeded = InventorySnapshot.objects.get(date=yesterday)
+        self.assertEqual((seeded.category, seeded.total_value, seeded.item_count), ('Tools', Decimal('10.00'), 1))
+        rolled = InventorySnapshot.objects.get(date=today)
+        self.assertEqual((rolled.category, rolled.total_value, rolled.item_count), ('Garden', Decimal('20.00'), 1))
+
+        response = self.client.get('/api/inventory/reports/trend/', {
+            'start': yesterday.isoformat(), 'end': today.isoformat()
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['total_value'] for p in response.data['points']], [10.0, 20.0])
+
+    def test_unledgered_edit_is_reconciled(self):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        take_snapshots(yesterday)
+        # An admin edit writes no ledger rows.
+        InventoryItem.objects.filter(pk=self.item.pk).update(quantity=7)
+
+        # The nightly run stays incremental and does not see the edit.
+        with mock.patch('inventory.snapshots.current_totals', side_effect=AssertionError('full scan')):
+            take_snapshots(today)
+        self.assertNotEqual(InventorySnapshot.objects.get(date=today).total_value, Decimal('35.00'))
+
+        InventorySnapshot.objects.filter(date=today).delete()
+        with self.assertLogs('inventory.snapshots', 'WARNING'):
+            call_command('snapshot_inventory_value', date=today.isoformat(), reconcile=True, stdout=io.StringIO())
+        rolled = InventorySnapshot.objects.get(date=today)
+        self.assertEqual((rolled.category, rolled.total_value), ('Tools', Decimal('35.00')))
+
+
+class ReportCacheTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reportuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        report_cache.clear()
+
+    def test_single_flight_coalesces_concurrent_calls(self):
+        flight = SingleFlight()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 42
+
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do('report', compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([value for value, _ in results], [42] * 5)
+        self.assertEqual(sum(shared for _, shared in results), 4)
+
+    @override_settings(REPORT_CACHE_MAX_STALE=0)
+    def test_reports_cached_until_data_changes(self):
+        before = report_cache.stats()
+        self.client.get('/api/inventory/reports/')
+        response = self.client.get('/api/inventory/reports/')
+        self.assertEqual(response.data['total_value'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/inventory/add/', {
+                'sku': 'RC001', 'item_name': 'Cached', 'quantity': 2, 'price': '3.00', 'category': 'Tools'
+            })
+        response = self.client.get('/api/inventory/reports/')
+        self.assertEqual(response.data['total_value'], 6.0)
+
+        after = report_cache.stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 2)
+
+    def test_data_version_is_shared_through_database(self):
+        version = get_data_version()
+        caches['default'].clear()
+        self.assertEqual(get_data_version(), version)
+
+        # A write committed by another worker process.
+        DataVersion.objects.filter(pk=1).update(version=F('version') + 1)
+        self.assertEqual(get_data_version(), version + 1)
+
+
+@override_settings(REPLICA_DATABASES=['replica1'], REPLICA_MAX_LAG_SECONDS=5)
+class ReplicaRoutingTest(TestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_in_sync_replica(self):
+        with mock.patch('my_project.db_router.replica_lag', return_value=0.5):
+            self.assertEqual(self.router.db_for_read(InventoryItem), 'replica1')
+        self.assertEqual(self.router.db_for_write(InventoryItem), 'default')
+
+    def test_lagging_or_unreachable_replica_is_skipped(self):
+        with mock.patch('my_project.db_router.replica_lag', return_value=30.0):
+            self.assertEqual(self.router.db_for_read(InventoryItem), 'default')
+        with mock.patch('my_project.db_router.replica_lag', return_value=None):
+            self.assertEqual(self.router.db_for_read(InventoryItem), 'default')
+
+    def test_writes_pin_reads_to_primary(self):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(InventoryItem))
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        factory = RequestFactory()
+        with mock.patch('my_project.db_router.replica_lag', return_value=0.0):
+            response = middleware(factory.post('/api/inventory/add/'))
+            cookie = response.cookies['db_primary_pin']
+
+            follow_up = factory.get('/api/inventory/list/')
+            follow_up.COOKIES['db_primary_pin'] = cookie.value
+            middleware(follow_up)
+            middleware(factory.get('/api/inventory/list/'))
+
+        self.assertEqual(seen, ['default', 'default', 'replica1'])
+
+    def test_report_reads_version_and_data_from_one_replica(self):
+        seen = []
+
+        def read_version():
+            seen.append(self.router.db_for_read(DataVersion))
+            return 7
+
+        def compute():
+            seen.append(self.router.db_for_read(InventoryItem))
+            return 'payload'
+
+        cache = ReportCache()
+        with mock.patch('my_project.db_router.replica_lag', return_value=0.5), \
+                mock.patch('inventory.report_cache.get_data_version', side_effect=read_version):
+            self.assertEqual(cache.get('report', compute), 'payload')
+            with primary_only():
+                cache.clear()
+                cache.get('report', compute)
+        self.assertEqual(seen, ['replica1', 'replica1', 'default', 'default'])
+
+
+@skipUnless('replica1' in settings.DATABASES, "no replica configured")
+@override_settings(REPLICA_DATABASES=['replica1'], REPLICA_MAX_LAG_SECONDS=1000)
+class ReplicaReadTest(TransactionTestCase):
+    # The replica alias mirrors the primary's test database; data must be
+    # committed for the replica connection to see it.
+    databases = {'default'} | ({'replica1'} & set(settings.DATABASES))
+
+    def test_list_reads_from_replica(self):
+        user = User.objects.create_user(username='replicauser', password='testpass123')
+        InventoryItem.objects.create(sku='RP001', item_name='Mirrored', quantity=1, price=Decimal('1.00'))
+        token = Token.objects.create(user=user)
+
+        with self.assertNumQueries(0, using='default'):
+            response = self.client.get('/api/inventory/list/', HTTP_AUTHORIZATION='Token ' + token.key)
+        self.assertEqual(len(response.json()['results']), 1)
+
+
+class FakeConnection:
+    closed = 0
+
+    def get_transaction_status(self):
+        return TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTest(TestCase):
+
+    def test_connections_are_reused(self):
+        pool = ConnectionPool(max_size=2)
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+        self.assertIs(pool.getconn(FakeConnection), first)
+        self.assertEqual(pool.stats()['connections_created'], 1)
+
+    def test_exhausted_pool_times_out(self):
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        pool.getconn(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+
+        stats = pool.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['saturation'], 1.0)
+
+    def test_closed_connection_is_replaced(self):
+        pool = ConnectionPool(max_size=1)
+        conn = pool.getconn(FakeConnection)
+        pool.putconn(conn)
+        conn.closed = 1
+        self.assertIsNot(pool.getconn(FakeConnection), conn)
+        self.assertEqual(pool.stats()['health_check_failures'], 1)
+
+    def test_connection_mid_transaction_is_discarded(self):
+        pool = ConnectionPool(max_size=1)
+        conn = pool.getconn(FakeConnection)
+        conn.get_transaction_status = lambda: TRANSACTION_STATUS_INTRANS
+        pool.putconn(conn)
+        self.assertEqual(conn.closed, 1)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+    def test_close_inside_atomic_block_does_not_pool(self):
+        pool = ConnectionPool(max_size=1)
+        wrapper = mock.MagicMock(in_atomic_block=True, connection=pool.getconn(FakeConnection))
+        wrapper.pool.return_value = pool
+        PooledDatabaseWrapper._close(wrapper)
+        self.assertEqual(pool.stats()['idle'], 0)
+        self.assertEqual(pool.stats()['connections_closed'], 1)
+
+
+class RendererTest(TestCase):
+
+    def test_orjson_matches_stdlib_output(self):
+        data = {
+            'price': Decimal('19.99'),
+            'created_at': timezone.now(),
+            'category': 'Électronique',
+            'items': [1, 2, 3],
+        }
+        fast = json.loads(ORJSONRenderer().render(data))
+        stdlib = json.loads(JSONRenderer().render(data))
+        self.assertEqual(fast, stdlib)
+
+    def test_orjson_parser(self):
+        parsed = ORJSONParser().parse(io.BytesIO(b'{"sku": "A1", "quantity": 3}'))
+        self.assertEqual(parsed, {'sku': 'A1', 'quantity': 3})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{bad'))
+
+    @skipUnless(renderers.msgpack is not None, "msgpack not installed")
+    def test_msgpack_round_trip(self):
+        data = {'price': Decimal('1.50'), 'quantity': 2}
+        packed = MessagePackRenderer().render(data)
+        self.assertEqual(MessagePackParser().parse(io.BytesIO(packed)), {'price': 1.5, 'quantity': 2})
+
+
+class CompressionMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.body = b'sku,item_name,quantity\n' * 500
+
+    def test_negotiates_preferred_encoding(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=1.0, identity;q=0.5'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0, identity'))
+        self.assertIsNone(negotiate_encoding(''))
+
+    def test_compresses_large_response(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse(self.body, content_type='text/csv'))
+        response = middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_skips_small_and_precompressed_responses(self):
+        small = CompressionMiddleware(lambda request: HttpResponse(b'{}'))
+        pdf = CompressionMiddleware(lambda request: HttpResponse(self.body, content_type='application/pdf'))
+
+        for middleware in (small, pdf):
+            response = middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_compresses_streaming_response_incrementally(self):
+        chunks = [b'row %d\n' % i for i in range(1000)]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks), content_type='text/csv')
+        )
+        response = middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+    def test_stream_of_small_chunks_compresses_like_one_body(self):
+        chunks = [b'2024-01-16 00:15,Update,Item %d,manager,Updated,-1,-19.99,Tools\r\n' % i for i in range(20000)]
+        whole = len(gzip.compress(b''.join(chunks)))
+        for encoding in available_encodings():
+            middleware = CompressionMiddleware(
+                lambda request: StreamingHttpResponse(iter(chunks), content_type='text/csv')
+            )
+            response = middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING=encoding))
+            streamed = b''.join(response.streaming_content)
+            self.assertLess(len(streamed), whole * 1.5, encoding)
+
+
+class SparseFieldsetTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='sparseuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        supplier = Supplier.objects.create(name='Acme', email='acme@example.com', phone='123')
+        for i in range(3):
+            InventoryItem.objects.create(
+                sku=f'SF00{i}', item_name=f'Item {i}', quantity=i, price=Decimal('1.00'), supplier=supplier
+            )
+
+    def test_only_requested_fields_are_returned(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/inventory/list/', {'fields': 'id,sku,quantity'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'sku', 'quantity'})
+        item_query = [q['sql'] for q in queries.captured_queries if 'inventory_inventoryitem' in q['sql']][0]
+        self.assertNotIn('item_name', item_query)
+        self.assertNotIn('inventory_supplier', item_query)
+
+    def test_related_field_is_joined(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/inventory/list/', {'fields': 'sku,supplier'})
+        self.assertEqual(response.data['results'][0]['supplier'], 'Acme')
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/inventory/transactions/', {'fields': 'id,bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': 'Invalid fields', 'details': 'Unknown fields: bogus'})
+
+
+class ItemLookupTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='scanneruser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.first = InventoryItem.objects.create(sku='SC001', item_name='Scanner A', quantity=5, price=Decimal('1.00'))
+        self.second = InventoryItem.objects.create(sku='SC002', item_name='Scanner B', quantity=7, price=Decimal('2.00'))
+        item_lookup_cache.clear()
+
+    def test_batch_lookup_by_sku_and_id(self):
+        response = self.client.get(
+            f'/api/inventory/lookup/?sku=SC001&sku=NOPE&ids={self.second.id},999999'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['sku'] for item in response.data['items']], ['SC001', 'SC002'])
+        self.assertEqual(response.data['missing'], {'skus': ['NOPE'], 'ids': [999999]})
+
+    def test_repeat_scans_are_served_from_cache(self):
+        self.client.get('/api/inventory/lookup/?sku=SC001')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/inventory/lookup/?sku=SC001')
+        self.assertEqual(response.data['items'][0]['quantity'], 5)
+
+    def test_update_invalidates_cached_sku(self):
+        self.client.get('/api/inventory/lookup/?sku=SC001')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/inventory/{self.first.id}/update/', {'quantity': 9})
+        response = self.client.get('/api/inventory/lookup/?sku=SC001')
+        self.assertEqual(response.data['items'][0]['quantity'], 9)
+
+    def test_low_stock_flip_invalidates_cached_sku(self):
+        InventoryItem.objects.filter(pk=self.first.pk).update(category='Scan')
+        self.client.get('/api/inventory/lookup/?sku=SC001')
+        CategoryThreshold.objects.create(category='Scan', reorder_threshold=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            evaluate_category('Scan')
+        item = self.client.get('/api/inventory/lookup/?sku=SC001').data['items'][0]
+        self.assertEqual((item['is_low_stock'], item['version']), (True, 2))
+
+
+class DetailCacheTest(APITestCase):
+
+    def setUp(self):
+        # Primary keys are reused between tests, so start from an empty cache.
+        caches['default'].clear()
+        self.user = User.objects.create_user(
+            username='detailuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.supplier = Supplier.objects.create(name='Detail Co', email='detail@example.com', phone='555')
+        self.item = InventoryItem.objects.create(
+            sku='DC001', item_name='Cached Item', quantity=1, price=Decimal('1.00'), supplier=self.supplier
+        )
+
+    def test_item_detail_is_read_through(self):
+        url = f'/api/inventory/{self.item.id}/'
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data['item']['supplier'], 'Detail Co')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/inventory/{self.item.id}/update/', {'item_name': 'Renamed'})
+        self.assertEqual(self.client.get(url).data['item']['item_name'], 'Renamed')
+
+    def test_supplier_changes_invalidate_dependent_payloads(self):
+        supplier_url = f'/api/inventory/suppliers/{self.supplier.id}/'
+        self.assertEqual(self.client.get(supplier_url).data['supplier']['linked_items'], 1)
+        self.client.get(f'/api/inventory/{self.item.id}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/inventory/add/', {
+                'sku': 'DC002', 'item_name': 'Another', 'quantity': 1, 'price': '1.00',
+                'supplier': self.supplier.id
+            })
+            self.client.patch(supplier_url + 'update/', {'name': 'Detail Ltd'})
+
+        self.assertEqual(self.client.get(supplier_url).data['supplier']['linked_items'], 2)
+        self.assertEqual(self.client.get(f'/api/inventory/{self.item.id}/').data['item']['supplier'], 'Detail Ltd')
+
+    def test_delete_invalidates_after_row_is_gone(self):
+        self.user.is_superuser = True
+        self.user.save()
+        url = f'/api/inventory/{self.item.id}/'
+        self.client.get(url)
+        row_present = []
+        with mock.patch('inventory.views.item_changed', side_effect=lambda item_id, **kwargs: row_present.append(
+            InventoryItem.objects.filter(pk=item_id).exists()
+        )):
+            response = self.client.delete(url + 'delete/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(row_present, [False])
+
+    def test_missing_object_is_not_cached(self):
+        response = self.client.get('/api/inventory/999999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_fill_reads_primary_and_keeps_foreign_lock(self):
+        cache = DetailCache('lock_test')
+        key = cache._data_key(1)
+        cache.cache.set(f'{key}:lock', 'other-filler', 60)
+        with mock.patch('inventory.detail_cache.time.sleep'):
+            value = cache.get(1, is_pinned_to_primary)
+        self.assertIs(value, True)
+        self.assertEqual(cache.cache.get(f'{key}:lock'), 'other-filler')
+        self.assertEqual(cache.stats()['lock_waits'], 1)
+
+
+class OptimisticConcurrencyTest(APITestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(
+            username='occuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.supplier = Supplier.objects.create(name='OCC Co', email='occ@example.com', phone='556')
+        self.item = InventoryItem.objects.create(
+            sku='OCC001', item_name='Versioned', quantity=5, price=Decimal('2.00'), supplier=self.supplier
+        )
+        self.url = f'/api/inventory/{self.item.id}/update/'
+
+    def test_detail_returns_version_etag(self):
+        response = self.client.get(f'/api/inventory/{self.item.id}/')
+        self.assertEqual(response['ETag'], '"1"')
+        self.assertEqual(response.data['item']['version'], 1)
+
+    def test_matching_if_match_applies_and_bumps_version(self):
+        response = self.client.patch(self.url, {'quantity': 7}, HTTP_IF_MATCH='W/"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.version), (7, 2))
+        self.assertEqual(Transaction.objects.get(item_id=self.item.id).quantity_delta, 2)
+
+    def test_unconditional_update_locks_the_row_it_ledgers(self):
+        locked = []
+        select_for_update = QuerySet.select_for_update
+
+        def record(queryset, *args, **kwargs):
+            locked.append(queryset.model)
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', record):
+            self.client.patch(self.url, {'quantity': 8})
+        self.assertIn(InventoryItem, locked)
+        self.assertEqual(Transaction.objects.get(item_id=self.item.id).quantity_delta, 3)
+
+    def test_stale_if_match_is_rejected(self):
+        self.client.patch(self.url, {'quantity': 6})
+        response = self.client.patch(self.url, {'quantity': 9}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response['ETag'], '"2"')
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 6)
+        self.assertEqual(Transaction.objects.filter(item_id=self.item.id).count(), 1)
+
+    def test_conditional_update_loses_race(self):
+        InventoryItem.objects.filter(pk=self.item.pk).update(version=F('version') + 1)
+        # The version check passes on the stale read; the UPDATE must still miss.
+        with mock.patch('inventory.views.get_object_or_404', return_value=self.item):
+            response = self.client.patch(self.url, {'quantity': 9}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 5)
+
+    def test_supplier_if_match(self):
+        url = f'/api/inventory/suppliers/{self.supplier.id}/update/'
+        response = self.client.patch(url, {'address': 'Dock 4'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['supplier']['version'], 2)
+        response = self.client.patch(url, {'address': 'Dock 5'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+
+class IdempotencyKeyTest(APITestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(
+            username='retryuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.payload = {'name': 'Retry Co', 'email': 'retry@example.com', 'phone': '557'}
+
+    def test_retry_replays_stored_response(self):
+        first = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='abc')
+        # The token lookup and the stored response.
+        with self.assertNumQueries(2):
+            second = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Supplier.objects.count(), 1)
+
+    def test_update_retry_is_ledgered_once(self):
+        item = InventoryItem.objects.create(sku='IDEM1', item_name='Retry', quantity=1, price=Decimal('1.00'))
+        for _ in range(2):
+            response = self.client.patch(f'/api/inventory/{item.id}/update/', {'quantity': 3}, HTTP_IDEMPOTENCY_KEY='k1')
+            self.assertEqual(response.data['item']['version'], 2)
+        self.assertEqual(Transaction.objects.filter(item_id=item.id).count(), 1)
+
+    def test_key_reused_with_different_body(self):
+        self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='abc')
+        response = self.client.post(
+            '/api/inventory/suppliers/add/', dict(self.payload, name='Other Co'), HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_keys_are_scoped_per_user(self):
+        self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='abc')
+        other = User.objects.create_user(username='otherretry', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=other).key)
+        response = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0.2)
+    def test_concurrent_duplicate_waits_for_first(self):
+        first = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='first')
+        stored = IdempotencyKey.objects.get(user=self.user, key_hash=hashlib.sha256(b'first').hexdigest())
+
+        # Another worker holds the claim and has not finished yet.
+        busy = IdempotencyKey.objects.create(
+            user=self.user, key_hash=hashlib.sha256(b'busy').hexdigest(),
+            fingerprint=stored.fingerprint, token='other-worker'
+        )
+        response = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='busy')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertTrue(IdempotencyKey.objects.filter(pk=busy.pk, token='other-worker').exists())
+
+        # The in-flight request finishing mid-wait hands its response over.
+        def finish(seconds):
+            IdempotencyKey.objects.filter(pk=busy.pk).update(
+                status_code=stored.status_code, response_data=stored.response_data,
+                response_headers=stored.response_headers
+            )
+
+        with mock.patch('inventory.idempotency.time.sleep', side_effect=finish):
+            response = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='busy')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, first.data)
+        self.assertEqual(Supplier.objects.count(), 1)
+
+    def test_retry_runs_when_holder_drops_its_claim(self):
+        held = IdempotencyKey.objects.create(
+            user=self.user, key_hash=hashlib.sha256(b'dropped').hexdigest(), fingerprint='x', token='failed-worker'
+        )
+        # The holder fails mid-wait and deletes its claim without a response.
+        with mock.patch('inventory.idempotency.time.sleep', side_effect=lambda seconds: held.delete()):
+            response = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='dropped')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(IdempotencyKey.objects.get(user=self.user).status_code, status.HTTP_201_CREATED)
+
+    @override_settings(IDEMPOTENCY_LOCK_TIMEOUT=30)
+    def test_abandoned_claim_is_taken_over(self):
+        abandoned = IdempotencyKey.objects.create(
+            user=self.user, key_hash=hashlib.sha256(b'stale').hexdigest(), fingerprint='x', token='dead-worker'
+        )
+        IdempotencyKey.objects.filter(pk=abandoned.pk).update(created_at=timezone.now() - timedelta(minutes=1))
+        response = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='stale')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        entry = IdempotencyKey.objects.get(user=self.user)
+        self.assertNotEqual(entry.token, 'dead-worker')
+        self.assertEqual(entry.status_code, status.HTTP_201_CREATED)
+
+    def test_server_error_drops_claim(self):
+        with mock.patch('inventory.views.SupplierSerializer.save', side_effect=RuntimeError('down')):
+            response = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='boom')
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.client.post('/api/inventory/suppliers/add/', self.payload, HTTP_IDEMPOTENCY_KEY='boom')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+@override_settings(SUPPLIER_DELETION_IN_BACKGROUND=False, SUPPLIER_DELETE_BATCH_SIZE=2)
+class SupplierDeletionJobTest(APITestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.admin = User.objects.create_superuser(
+            username='deleteadmin',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.supplier = Supplier.objects.create(name='Bulk Co', email='bulk@example.com', phone='558')
+        for index in range(5):
+            InventoryItem.objects.create(
+                sku=f'BULK{index}', item_name=f'Bulk {index}', quantity=index + 1,
+                price=Decimal('2.00'), category='Bulk', supplier=self.supplier
+            )
+
+    def test_delete_runs_in_batches_and_ledgers_items(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/inventory/suppliers/{self.supplier.id}/delete/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['job']['total_items'], 5)
+
+        response = self.client.get(f"/api/inventory/suppliers/deletions/{response.data['job']['id']}/")
+        self.assertEqual(response.data['job']['status'], 'completed')
+        self.assertEqual(response.data['job']['deleted_items'], 5)
+        self.assertEqual(response.data['job']['progress'], 100)
+        self.assertFalse(Supplier.objects.filter(pk=self.supplier.pk).exists())
+        self.assertFalse(InventoryItem.objects.exists())
+
+        ledger = Transaction.objects.filter(transaction_type='delete')
+        self.assertEqual(ledger.count(), 5)
+        totals = ledger.aggregate(qty=Sum('quantity_delta'), value=Sum('value_delta'), count=Sum('item_count_delta'))
+        self.assertEqual(totals, {'qty': -15, 'value': Decimal('-30.00'), 'count': -5})
+
+    def test_duplicate_delete_returns_active_job(self):
+        first = self.client.delete(f'/api/inventory/suppliers/{self.supplier.id}/delete/')
+        second = self.client.delete(f'/api/inventory/suppliers/{self.supplier.id}/delete/')
+        self.assertEqual(first.data['job']['id'], second.data['job']['id'])
+        self.assertEqual(SupplierDeletionJob.objects.count(), 1)
+
+    def test_resume_command_finishes_interrupted_job(self):
+        job = SupplierDeletionJob.objects.create(
+            supplier_id=self.supplier.pk, supplier_name=self.supplier.name, total_items=5, status='running'
+        )
+        InventoryItem.objects.filter(sku='BULK0').delete()
+        SupplierDeletionJob.objects.filter(pk=job.pk).update(
+            deleted_items=1, updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        call_command('resume_supplier_deletions', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted_items), ('completed', 5))
+        self.assertEqual(Transaction.objects.get(details__startswith='Removed SKU BULK1').user_name, 'system')
+
+    def test_items_left_behind_by_a_batch_are_ledgered(self):
+        job = SupplierDeletionJob.objects.create(
+            supplier_id=self.supplier.pk, supplier_name=self.supplier.name, total_items=5
+        )
+        pinned = []
+        delete_batch = supplier_deletion._delete_batch
+
+        def first_batch_finds_nothing(*args):
+            # As if every remaining row was locked by another transaction.
+            pinned.append(is_pinned_to_primary())
+            return 0 if len(pinned) == 1 else delete_batch(*args)
+
+        with mock.patch('inventory.supplier_deletion._delete_batch', side_effect=first_batch_finds_nothing):
+            job = supplier_deletion.run_job(job.pk)
+
+        self.assertEqual(job.status, 'completed')
+        self.assertTrue(all(pinned))
+        self.assertFalse(Supplier.objects.filter(pk=self.supplier.pk).exists())
+        self.assertEqual(Transaction.objects.filter(transaction_type='delete').count(), 5)
+
+
+@override_settings(BULK_CHUNK_SIZE=2)
+class BulkItemTest(APITestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.admin = User.objects.create_superuser(
+            username='bulkadmin',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        for index in range(5):
+            InventoryItem.objects.create(
+                sku=f'BLK{index}', item_name=f'Bulk {index}', quantity=2,
+                price=Decimal('1.00'), category='Old' if index < 3 else 'Keep'
+            )
+
+    def test_dry_run_counts_without_writing(self):
+        response = self.client.post('/api/inventory/bulk/update/', {
+            'filters': {'category': 'old'}, 'set': {'price': '3.00'}, 'dry_run': True
+        }, format='json')
+        self.assertEqual(response.data['matched'], 3)
+        self.assertFalse(InventoryItem.objects.filter(price=Decimal('3.00')).exists())
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_bulk_reprice_by_filter(self):
+        response = self.client.post('/api/inventory/bulk/update/', {
+            'filters': {'category': 'Old'}, 'set': {'price': '3.00'}
+        }, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        repriced = InventoryItem.objects.filter(category='Old')
+        self.assertEqual(set(repriced.values_list('price', 'version')), {(Decimal('3.00'), 2)})
+        self.assertEqual(Transaction.objects.aggregate(value=Sum('value_delta'))['value'], Decimal('12.00'))
+
+    def test_bulk_category_move_ledgers_both_sides(self):
+        self.client.post('/api/inventory/bulk/update/', {
+            'filters': {'category': 'Old'}, 'set': {'category': 'New'}
+        }, format='json')
+        self.assertEqual(InventoryItem.objects.filter(category='New').count(), 3)
+        moves = Transaction.objects.values('category').annotate(count=Sum('item_count_delta'))
+        self.assertEqual({row['category']: row['count'] for row in moves}, {'Old': -3, 'New': 3})
+
+    def test_bulk_update_rejects_unknown_fields(self):
+        response = self.client.post('/api/inventory/bulk/update/', {
+            'ids': [1], 'set': {'sku': 'X'}
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/inventory/bulk/update/', {'set': {'price': '1.00'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_delete_by_ids(self):
+        ids = list(InventoryItem.objects.filter(category='Keep').values_list('id', flat=True))
+        response = self.client.post('/api/inventory/bulk/delete/', {'ids': ids}, format='json')
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(InventoryItem.objects.count(), 3)
+        self.assertEqual(Transaction.objects.filter(transaction_type='delete').count(), 2)
+
+    def test_bulk_delete_requires_admin(self):
+        user = User.objects.create_user(username='bulkuser', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=user).key)
+        response = self.client.post('/api/inventory/bulk/delete/', {'filters': {'category': 'Old'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(InventoryItem.objects.count(), 5)
+
+    @override_settings(BULK_MAX_IDS=3)
+    def test_id_selection_is_capped(self):
+        ids = list(InventoryItem.objects.values_list('id', flat=True))
+        response = self.client.post('/api/inventory/bulk/delete/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(InventoryItem.objects.count(), 5)
+
+    def test_failing_chunk_rolls_back_alone(self):
+        with mock.patch('inventory.bulk.evaluate_items', side_effect=[None, RuntimeError('boom')]):
+            with self.assertRaises(RuntimeError):
+                bulk_update_items(InventoryItem.objects.all(), {'quantity': 9}, self.admin)
+        self.assertEqual(InventoryItem.objects.filter(quantity=9).count(), 2)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+
+class LowStockTest(APITestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.admin = User.objects.create_superuser(
+            username='stockadmin',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.events = []
+        low_stock_changed.connect(self.record, dispatch_uid='low-stock-test')
+        self.addCleanup(low_stock_changed.disconnect, dispatch_uid='low-stock-test')
+
+    def record(self, sender, entered, cleared, **kwargs):
+        self.events.append((entered, cleared))
+
+    def make_item(self, sku, quantity, **extra):
+        return InventoryItem.objects.create(
+            sku=sku, item_name=sku, quantity=quantity, price=Decimal('1.00'), **extra
+        )
+
+    def test_item_threshold_is_evaluated_on_update(self):
+        item = self.make_item('LOW1', 10, reorder_threshold=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/inventory/{item.id}/update/', {'quantity': 4})
+        self.assertTrue(response.data['item']['is_low_stock'])
+        self.assertEqual(self.events, [([item.id], [])])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/inventory/{item.id}/update/', {'quantity': 6})
+        item.refresh_from_db()
+        self.assertFalse(item.is_low_stock)
+        self.assertEqual(self.events[-1], ([], [item.id]))
+
+    def test_category_threshold_applies_to_items_without_their_own(self):
+        inherits = self.make_item('LOW2', 3, category='Parts')
+        overrides = self.make_item('LOW3', 3, category='Parts', reorder_threshold=1)
+        response = self.client.post('/api/inventory/low-stock/thresholds/', {
+            'category': 'Parts', 'reorder_threshold': 5
+        }, format='json')
+        self.assertEqual(response.data['entered'], 1)
+
+        response = self.client.get('/api/inventory/low-stock/')
+        self.assertEqual([row['sku'] for row in response.data['results']], [inherits.sku])
+
+        response = self.client.post('/api/inventory/add/', {
+            'sku': 'LOW4', 'item_name': 'New part', 'quantity': 2, 'price': '1.00', 'category': 'Parts'
+        })
+        self.assertTrue(response.data['is_low_stock'])
+        self.assertFalse(InventoryItem.objects.get(pk=overrides.pk).is_low_stock)
+
+    def test_bulk_quantity_change_is_evaluated(self):
+        items = [self.make_item(f'LOWB{index}', 10, reorder_threshold=5) for index in range(3)]
+        self.client.post('/api/inventory/bulk/update/', {
+            'ids': [item.id for item in items[:2]], 'set': {'quantity': 1}
+        }, format='json')
+        self.assertEqual(InventoryItem.objects.filter(is_low_stock=True).count(), 2)
+
+    def test_low_stock_list_excludes_stocked_items(self):
+        self.make_item('LOW5', 100, reorder_threshold=5)
+        response = self.client.get('/api/inventory/low-stock/')
+        self.assertEqual(response.data['results'], [])
+
+
+class ExportBackendTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='exportuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_cold_start_leaves_heavy_modules_unloaded(self):
+        # Timing and RSS vary by machine; benchmark_startup reports them.
+        for entry_point in ('my_project.wsgi', 'my_project.asgi'):
+            result = measure_startup(entry_point)
+            self.assertEqual(eager_lazy_imports(result['modules']), [], entry_point)
+
+    def test_export_by_format(self):
+        InventoryItem.objects.create(sku='EXP1', item_name='Exported', quantity=2, price=Decimal('3.00'))
+        response = self.client.get('/api/inventory/reports/export/csv/')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('EXP1', response.content.decode())
+        self.assertIn('csv', loaded_backends())
+
+        response = self.client.get('/api/inventory/reports/export/docx/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def read_sheets(self, response):
+        """Map sheet name to worksheet XML, resolved through the workbook rels."""
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as workbook:
+            targets = dict(re.findall(
+                r'<Relationship Id="([^"]+)" Type="[^"]+/worksheet" Target="([^"]+)"',
+                workbook.read('xl/_rels/workbook.xml.rels').decode()
+            ))
+            sheets = re.findall(
+                r'<sheet name="([^"]+)" sheetId="\d+" r:id="([^"]+)"', workbook.read('xl/workbook.xml').decode()
+            )
+            return {name: workbook.read('xl/' + targets[rel]).decode() for name, rel in sheets}
+
+    def test_xlsx_export_has_summary_and_category_sheets(self):
+        InventoryItem.objects.create(sku='XL1', item_name='Widget', quantity=2, price=Decimal('3.50'), category='Tools')
+        InventoryItem.objects.create(sku='XL2', item_name='Gadget', quantity=1, price=Decimal('1.00'), category='Tools')
+        InventoryItem.objects.create(sku='XL3', item_name='Loose', quantity=4, price=Decimal('2.25'))
+
+        response = self.client.get('/api/inventory/reports/export/xlsx/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('inventory_report.xlsx', response['Content-Disposition'])
+        sheets = self.read_sheets(response)
+        self.assertEqual(sorted(sheets), ['Summary', 'Tools', 'Uncategorized'])
+        # constant_memory mode writes inline strings row by row.
+        self.assertIn('<t>Widget</t>', sheets['Tools'])
+        self.assertIn('<t>Loose</t>', sheets['Uncategorized'])
+        # Tools: 2 items, 3 units, $8.00; all items: $17.00.
+        self.assertIn('<v>8</v>', sheets['Summary'])
+        self.assertIn('<v>17</v>', sheets['Summary'])
+
+    def test_sheet_names_are_valid_and_unique(self):
+        taken = set()
+        self.assertEqual(xlsx_sheet_name('Parts/Spares', taken), 'Parts-Spares')
+        self.assertEqual(xlsx_sheet_name('parts-spares', taken), 'parts-spares (2)')
+        self.assertEqual(len(xlsx_sheet_name('x' * 40, taken)), 31)
+
+
+@override_settings(EXPORT_WATERMARK_MARGIN=0)
+class ColumnarExportTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='biuser',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.item = InventoryItem.objects.create(
+            sku='COL1', item_name='Columnar', quantity=3, price=Decimal('12.34'), category='BI'
+        )
+
+    def read(self, response, reader):
+        return reader(io.BytesIO(b''.join(response.streaming_content)))
+
+    @override_settings(EXPORT_BATCH_ROWS=2)
+    def test_parquet_export_keeps_types(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        for index in range(4):
+            InventoryItem.objects.create(sku=f'COLB{index}', item_name='Batch', quantity=1, price=Decimal('1.00'))
+
+        response = self.client.get('/api/inventory/exports/items/')
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        table = self.read(response, pq.read_table)
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.schema.field('price').type, pa.decimal128(10, 2))
+        self.assertEqual(table.schema.field('updated_at').type, pa.timestamp('us', tz='UTC'))
+        self.assertEqual(table.column('price')[0].as_py(), Decimal('12.34'))
+
+    def test_arrow_transactions_since_watermark(self):
+        import pyarrow as pa
+        self.client.patch(f'/api/inventory/{self.item.id}/update/', {'quantity': 4})
+        response = self.client.get('/api/inventory/exports/transactions/', {'output': 'arrow'})
+        table = self.read(response, lambda source: pa.ipc.open_stream(source).read_all())
+        self.assertEqual(table.column('quantity_delta').to_pylist(), [1])
+        watermark = response['X-Export-Watermark']
+
+        response = self.client.get('/api/inventory/exports/transactions/', {'output': 'arrow', 'since': watermark})
+        table = self.read(response, lambda source: pa.ipc.open_stream(source).read_all())
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(response['X-Export-Watermark'], watermark)
+
+        self.client.patch(f'/api/inventory/{self.item.id}/update/', {'quantity': 6})
+        response = self.client.get('/api/inventory/exports/transactions/', {'output': 'arrow', 'since': watermark})
+        table = self.read(response, lambda source: pa.ipc.open_stream(source).read_all())
+        self.assertEqual(table.column('quantity_delta').to_pylist(), [2])
+
+    def test_window_stops_short_of_recent_writes(self):
+        from .export_backends import columnar
+        with self.settings(EXPORT_WATERMARK_MARGIN=60):
+            queryset, watermark = columnar.export_window('items')
+            self.assertEqual((list(queryset), watermark), ([], None))
+
+            settled = timezone.now() - timedelta(minutes=5)
+            InventoryItem.objects.filter(pk=self.item.pk).update(updated_at=settled)
+            queryset, watermark = columnar.export_window('items')
+        self.assertEqual([item.sku for item in queryset], ['COL1'])
+        self.assertEqual(watermark, settled)
+
+    def test_low_stock_flip_reaches_next_export(self):
+        from .export_backends import columnar
+        _, watermark = columnar.export_window('items')
+        CategoryThreshold.objects.create(category='BI', reorder_threshold=5)
+        evaluate_category('BI')
+
+        queryset, _ = columnar.export_window('items', watermark)
+        self.assertEqual([(item.sku, item.is_low_stock, item.version) for item in queryset], [('COL1', True, 2)])
+
+    def test_unknown_table_or_bad_watermark(self):
+        self.assertEqual(self.client.get('/api/inventory/exports/users/').status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get('/api/inventory/exports/items/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ProfilingMiddlewareTest(APITestCase):
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+        overrides = override_settings(
+            PROFILER_ENABLED=True, PROFILER_DIR=self.profile_dir, PROFILER_INTERVAL=0.001, PROFILER_MAX_PROFILES=2
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.admin = User.objects.create_superuser(username='profadmin', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.admin).key)
+        InventoryItem.objects.create(sku='PRF1', item_name='Profiled', quantity=1, price=Decimal('1.00'), category='Tools')
+
+    def test_header_profiles_admin_request(self):
+        response = self.client.get('/api/inventory/reports/', HTTP_X_PROFILE='1')
+        profile_id = response['X-Profile-Id']
+
+        listing = self.client.get('/api/inventory/profiles/').data['profiles']
+        self.assertEqual([entry['id'] for entry in listing], [profile_id])
+        self.assertEqual(listing[0]['path'], '/api/inventory/reports/')
+        self.assertGreater(listing[0]['sql_count'], 0)
+
+        profile = json.loads(self.client.get(f'/api/inventory/profiles/{profile_id}/').content)
+        self.assertTrue(any('SELECT' in query['sql'] for query in profile['sql']))
+        folded = self.client.get(f'/api/inventory/profiles/{profile_id}/', {'output': 'collapsed'})
+        self.assertEqual(folded['Content-Type'], 'text/plain')
+
+    def test_header_from_non_admin_is_discarded(self):
+        user = User.objects.create_user(username='profuser', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=user).key)
+        with mock.patch('my_project.middleware.RequestProfile') as profiler:
+            response = self.client.get('/api/inventory/list/', HTTP_X_PROFILE='1')
+            self.client.credentials()
+            self.client.get('/api/inventory/list/', HTTP_X_PROFILE='1', HTTP_AUTHORIZATION='Token bogus')
+        profiler.assert_not_called()
+        self.assertFalse(response.has_header('X-Profile-Id'))
+        self.assertEqual(os.listdir(self.profile_dir), [])
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.get(user=user).key)
+        self.assertEqual(self.client.get('/api/inventory/profiles/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sampling_and_retention(self):
+        with override_settings(PROFILER_SAMPLE_RATE=1.0):
+            for _ in range(3):
+                self.client.get('/api/inventory/list/')
+        self.assertEqual(len(os.listdir(self.profile_dir)), 2)
+
+    def test_unknown_profile_id(self):
+        response = self.client.get('/api/inventory/profiles/..%2Fsettings/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(PROFILER_ENABLED=False)
+    def test_disabled_middleware_is_not_loaded(self):
+        response = self.client.get('/api/inventory/list/', HTTP_X_PROFILE='1')
+        self.assertFalse(response.has_header('X-Profile-Id'))
+
+
+class SlowQueryLogTest(APITestCase):
+
+    def setUp(self):
+        # The recorder is attached when a connection opens; the test
+        # connection may predate the app registry being ready.
+        slow_queries.install_recorder(None, connection)
+        self.admin = User.objects.create_superuser(username='slowadmin', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.admin).key)
+        self.item = InventoryItem.objects.create(
+            sku='SLW1', item_name='Slow', quantity=1, price=Decimal('1.00'), category='Tools'
+        )
+        caches['default'].clear()
+
+    def test_fingerprint_ignores_literals(self):
+        self.assertEqual(
+            slow_queries.fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND name = 'a'"),
+            slow_queries.fingerprint("SELECT *  FROM t WHERE id IN (%s) AND name = 'bb'"),
+        )
+
+    def test_records_view_params_and_plan(self):
+        with override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_ASYNC=False, SLOW_QUERY_CAPTURE_PARAMS=True):
+            self.client.get(f'/api/inventory/{self.item.id}/')
+
+        entry = SlowQuery.objects.filter(
+            sql__contains='FROM "inventory_inventoryitem"', view_name='inventory.views.get_inventory_item'
+        ).first()
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.path, f'/api/inventory/{self.item.id}/')
+        self.assertIn(str(self.item.id), entry.params)
+        self.assertEqual(entry.plan_status, 'captured')
+        self.assertTrue(entry.plan)
+        # The recorder's own inserts are not logged.
+        self.assertFalse(SlowQuery.objects.filter(sql__contains='inventory_slowquery').exists())
+
+    def test_params_are_not_stored_by_default(self):
+        with override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_ASYNC=False):
+            self.client.get(f'/api/inventory/{self.item.id}/')
+
+        entries = SlowQuery.objects.exclude(sql__contains='inventory_slowquery')
+        self.assertTrue(entries.exists())
+        self.assertFalse(entries.exclude(params='').exists())
+
+    def test_plan_literals_are_redacted(self):
+        with mock.patch.object(slow_queries, 'explain', return_value="Filter: ((key)::text = 'secret'::text)"), \
+                override_settings(SLOW_QUERY_ASYNC=False):
+            entry = slow_queries.record({
+                'alias': 'default', 'sql': 'SELECT 1 WHERE key = %s', 'params': ('secret',), 'many': False,
+                'duration_ms': 1.0, 'view_name': '', 'path': '',
+            })
+        self.assertEqual(entry.params, '')
+        self.assertEqual(entry.plan, "Filter: ((key)::text = '?'::text)")
+
+    def test_fast_queries_are_not_recorded(self):
+        with override_settings(SLOW_QUERY_MS=10000, SLOW_QUERY_ASYNC=False):
+            self.client.get('/api/inventory/list/')
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_endpoints_are_admin_only(self):
+        with override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_ASYNC=False):
+            self.client.get('/api/inventory/list/')
+            self.client.get('/api/inventory/list/')
+
+        listing = self.client.get('/api/inventory/slow-queries/', {'limit': 3})
+        self.assertEqual(len(listing.data['slow_queries']), 3)
+        detail = self.client.get(f"/api/inventory/slow-queries/{listing.data['slow_queries'][0]['id']}/")
+        self.assertIn('plan', detail.data['slow_query'])
+
+        groups = self.client.get('/api/inventory/slow-queries/', {'group': 'fingerprint'}).data['groups']
+        self.assertTrue(any(group['calls'] >= 2 for group in groups))
+
+        user = User.objects.create_user(username='slowuser', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=user).key)
+        self.assertEqual(self.client.get('/api/inventory/slow-queries/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_lists_and_purges(self):
+        with override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_ASYNC=False):
+            self.client.get('/api/inventory/list/')
+        out = io.StringIO()
+        call_command('slow_queries', '--top', stdout=out)
+        self.assertIn('calls', out.getvalue())
+
+        SlowQuery.objects.update(created_at=timezone.now() - timedelta(days=10))
+        call_command('slow_queries', '--purge-days', '7', stdout=io.StringIO())
+        self.assertFalse(SlowQuery.objects.exists())
+
+
+class LeanMiddlewareTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='leanadmin', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+
+    def test_api_skips_browser_middleware(self):
+        self.client.cookies['auth_token'] = self.token.key
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['username'], 'leanadmin')
+        self.assertFalse(response.has_header('X-Frame-Options'))
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+
+    def test_admin_keeps_full_stack(self):
+        response = self.client.get('/admin/login/')
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+        self.assertTrue(self.client.login(username='leanadmin', password='testpass123'))
+        self.assertEqual(self.client.get('/admin/').status_code, status.HTTP_200_OK)
+
+    def test_session_does_not_authenticate_api(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with override_settings(LEAN_MIDDLEWARE_PATHS=[]):
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+
+    def test_admin_checks_accept_lean_middleware(self):
+        call_command('check', stdout=io.StringIO())
+
+
+class TransactionFeedTest(APITestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='feeduser', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=user).key)
+        created_at = timezone.datetime(2024, 1, 15, 18, 45, 30, tzinfo=dt_timezone.utc)
+        for transaction_type, item_name in [('add', 'Drill'), ('update', 'Saw'), ('delete', 'Hammer, claw')]:
+            entry = Transaction.objects.create(
+                transaction_type=transaction_type, item_name=item_name, user_name='feeduser',
+                details=f'{transaction_type} {item_name}', quantity_delta=2, value_delta=Decimal('12.50'),
+                category='Tools'
+            )
+            Transaction.objects.filter(pk=entry.pk).update(created_at=created_at)
+            created_at += timedelta(minutes=1)
+
+    def test_list_formats_dates_and_labels(self):
+        rows = self.client.get('/api/inventory/transactions/').data['results']
+        self.assertEqual(
+            [(row['formatted_date'], row['transaction_type_display']) for row in rows],
+            [('2024-01-16 00:15', 'Add'), ('2024-01-16 00:16', 'Update'), ('2024-01-16 00:17', 'Delete')]
+        )
+        self.assertEqual(rows[0]['created_at'], '2024-01-16T00:15:30+05:30')
+
+        filtered = self.client.get('/api/inventory/transactions/', {'type': 'update'}).data['results']
+        self.assertEqual([row['item_name'] for row in filtered], ['Saw'])
+
+    def test_formatter_caches_per_minute(self):
+        format_date = TimestampFormatter()
+        moment = timezone.datetime(2024, 6, 30, 18, 29, 59, 999999, tzinfo=dt_timezone.utc)
+        self.assertEqual(format_date(moment), '2024-06-30 23:59')
+        self.assertEqual(format_date(moment - timedelta(seconds=59)), '2024-06-30 23:59')
+        self.assertEqual(format_date(moment + timedelta(microseconds=1)), '2024-07-01 00:00')
+        self.assertEqual(len(format_date.cache), 2)
+
+    def test_csv_export_streams_feed(self):
+        response = self.client.get('/api/inventory/transactions/export-csv/', {'search': 'a'})
+        self.assertIsInstance(response, StreamingHttpResponse)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, [
+            'Date,Type,Item,User,Details,Quantity Change,Value Change,Category',
+            '2024-01-16 00:17,Delete,"Hammer, claw",feeduser,"delete Hammer, claw",2,12.50,Tools',
+            '2024-01-16 00:16,Update,Saw,feeduser,update Saw,2,12.50,Tools',
+            '2024-01-16 00:15,Add,Drill,feeduser,add Drill,2,12.50,Tools',
+        ])
+
+    def test_csv_export_joins_rows_into_blocks(self):
+        response = self.client.get('/api/inventory/transactions/export-csv/')
+        self.assertEqual(len(list(response.streaming_content)), 1)
+
+        with self.settings(CSV_BLOCK_BYTES=100):
+            blocks = list(csv_lines(Transaction.objects.order_by('pk')))
+        self.assertEqual(len(blocks), 2)
+        self.assertEqual(''.join(blocks).count('\r\n'), 4)
@@ -4,16 +4,32 @@ from . import views
 urlpatterns = [
     path('add/', views.add_inventory_item, name='add_inventory_item'),
     path('list/', views.InventoryItemListView.as_view(), name='list_inventory_items'),
+    path('lookup/', views.lookup_inventory_items, name='lookup_inventory_items'),
+    path('low-stock/', views.LowStockItemListView.as_view(), name='low_stock_items'),
+    path('low-stock/thresholds/', views.category_thresholds, name='category_thresholds'),
     path('<int:id>/', views.get_inventory_item, name='get_inventory_item'),
     path('<int:id>/update/', views.update_inventory_item, name='update_inventory_item'),
     path('<int:id>/delete/', views.delete_inventory_item, name='delete_inventory_item'),
+    path('bulk/update/', views.bulk_update_inventory_items, name='bulk_update_inventory_items'),
+    path('bulk/delete/', views.bulk_delete_inventory_items, name='bulk_delete_inventory_items'),
     path('suppliers/add/', views.add_supplier, name='add_supplier'),
     path('suppliers/list/', views.SupplierListView.as_view(), name='list_suppliers'),
     path('suppliers/<int:id>/', views.get_supplier, name='get_supplier'),
     path('suppliers/<int:id>/update/', views.update_supplier, name='update_supplier'),
     path('suppliers/<int:id>/delete/', views.delete_supplier, name='delete_supplier'),
+    path('suppliers/deletions/<int:job_id>/', views.get_supplier_deletion_job, name='supplier_deletion_job'),
     path('transactions/', views.TransactionListView.as_view(), name='list_transactions'),
+    path('transactions/export-csv/', views.export_transactions_csv, name='export_transactions_csv'),
     path('reports/', views.get_reports_data, name='reports_data'),
+    path('reports/analytics/', views.get_inventory_analytics, name='inventory_analytics'),
+    path('reports/trend/', views.get_reports_trend, name='reports_trend'),
     path('reports/export-csv/', views.export_reports_csv, name='export_reports_csv'),
     path('reports/export-pdf/', views.export_reports_pdf, name='export_reports_pdf'),
+    path('reports/export/<str:export_format>/', views.export_report, name='export_report'),
+    path('exports/<str:table>/', views.export_table, name='export_table'),
+    path('metrics/', views.get_metrics, name='metrics'),
+    path('profiles/', views.list_request_profiles, name='list_request_profiles'),
+    path('profiles/<str:profile_id>/', views.download_request_profile, name='download_request_profile'),
+    path('slow-queries/', views.list_slow_queries, name='list_slow_queries'),
+    path('slow-queries/<int:query_id>/', views.get_slow_query, name='get_slow_query'),
 ]
\ No newline at end of file
@@ -3,38 +3,82 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import InventoryItem,Supplier,Transaction
-from .serializers import InventoryItemSerializer,SupplierSerializer,TransactionSerializer
+from .models import InventoryItem,Supplier,Transaction,SupplierDeletionJob,CategoryThreshold,SlowQuery
+from .serializers import InventoryItemSerializer,SupplierSerializer,TransactionSerializer,SupplierDeletionJobSerializer,SlowQuerySerializer
 from .pagination import InventoryItemCursorPagination
+from .snapshots import trend
+from .report_cache import report_cache, data_changed
+from .lookup_cache import item_lookup_cache
+from .detail_cache import item_detail_cache, supplier_detail_cache
+from .cache_invalidation import item_changed, supplier_changed
+from .supplier_deletion import schedule_supplier_deletion
+from .export_backends import get_backend, loaded_backends, registry as export_registry, UnknownExportFormat
+from .low_stock import LOW_STOCK_FIELDS, evaluate_items, evaluate_category
+from .transaction_feed import filter_transactions, csv_lines
+from .bulk import (
+    BULK_UPDATE_FIELDS, filter_inventory_items, parse_selection, is_dry_run, bulk_update_items, bulk_delete_items
+)
+from .idempotency import idempotent
+from . import idempotency
+from .concurrency import etag, if_match_versions, versioned_update, precondition_failed
+from my_project.pooled_postgresql.pool import pool_stats
+from my_project.profiling import list_profiles, load_profile, collapsed_stacks
+from my_project import slow_queries
+from authentication import hashing
 from rest_framework.generics import ListAPIView
+from django.db import transaction
 from django.db.models import Q,Sum, F, Count
-from django.http import HttpResponse
-import csv
-from xhtml2pdf import pisa
-import io
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.conf import settings
+from datetime import date, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import json
+from django.utils import timezone
 
 def check_admin_permission(user):
     return user.is_superuser
 
-def log_transaction(transaction_type, item_name, user, details=""):
+def stock_value(item):
+    return item.price * item.quantity
+
+def log_transaction(transaction_type, item, user, details="", quantity_delta=0, value_delta=Decimal('0.00'),
+                    item_count_delta=0, category=None):
     user_name = user.first_name if user.first_name else user.username
     Transaction.objects.create(
         transaction_type=transaction_type,
-        item_name=item_name,
+        item_name=item.item_name,
+        item_id=item.pk,
+        user=user,
         user_name=user_name,
-        details=details
+        details=details,
+        quantity_delta=quantity_delta,
+        value_delta=value_delta,
+        category=(item.category or '') if category is None else category,
+        item_count_delta=item_count_delta
     )
+    data_changed()
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def add_inventory_item(request):
     serializer = InventoryItemSerializer(data=request.data)
     if serializer.is_valid():
         try:
             item = serializer.save()
-            log_transaction('add', item.item_name, request.user, f"+{item.quantity} units")
+            entered, _ = evaluate_items([item.id])
+            if entered:
+                item.refresh_from_db(fields=LOW_STOCK_FIELDS)
+            log_transaction(
+                'add', item, request.user, f"+{item.quantity} units",
+                quantity_delta=item.quantity, value_delta=stock_value(item), item_count_delta=1
+            )
+            item_changed(item.id, supplier_ids=[item.supplier_id])
             # result = InventoryItemSerializer(item)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            response = Response(serializer.data, status=status.HTTP_201_CREATED)
+            response['ETag'] = etag(item.version)
+            return response
         
         except Exception as e:
             return Response({
@@ -47,40 +91,159 @@ def add_inventory_item(request):
         'details': serializer.errors
     }, status=status.HTTP_400_BAD_REQUEST)
 
-class InventoryItemListView(ListAPIView):
+class SparseFieldsetViewMixin:
+    """Support `?fields=a,b,c` on list views.
+
+    The serializer only renders the requested fields and the queryset only
+    selects the columns (and joins) those fields need.
+    """
+    # Serializer fields that don't map 1:1 onto a model column.
+    sparse_field_columns = {}
+    # Serializer fields rendered from a related model, as select_related paths.
+    sparse_field_related = {}
+
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            raw = self.request.query_params.get('fields')
+            self._requested_fields = None
+            if raw:
+                self._requested_fields = [name.strip() for name in raw.split(',') if name.strip()]
+        return self._requested_fields
+
+    def list(self, request, *args, **kwargs):
+        requested = self.get_requested_fields() or []
+        available = self.get_serializer_class()().fields
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            return Response({
+                'error': 'Invalid fields',
+                'details': f"Unknown fields: {', '.join(unknown)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def prune_queryset(self, queryset):
+        requested = self.get_requested_fields()
+        related = [
+            path for name, path in self.sparse_field_related.items()
+            if requested is None or name in requested
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        if requested is None:
+            return queryset
+
+        model_fields = {field.name for field in queryset.model._meta.concrete_fields}
+        ordering = self.pagination_class.ordering
+        columns = {'pk'}
+        columns.update(field.lstrip('-') for field in ([ordering] if isinstance(ordering, str) else ordering))
+        for name in requested:
+            if name in self.sparse_field_related:
+                path = self.sparse_field_related[name]
+                columns.add(path)
+                columns.update(f'{path}__{column}' for column in self.sparse_field_columns[name])
+            elif name in self.sparse_field_columns:
+                columns.update(self.sparse_field_columns[name])
+            elif name in model_fields:
+                columns.add(name)
+        return queryset.only(*columns)
+
+
+class InventoryItemListView(SparseFieldsetViewMixin, ListAPIView):
     serializer_class = InventoryItemSerializer
     pagination_class = InventoryItemCursorPagination
     permission_classes = [IsAuthenticated]
+    sparse_field_columns = {'supplier': ['name']}
+    sparse_field_related = {'supplier': 'supplier'}
     
     def get_queryset(self):
-        queryset = InventoryItem.objects.all()
-        category = self.request.query_params.get('category')
-        supplier = self.request.query_params.get('supplier')
-        search = self.request.query_params.get('search')
-       
-        if category:
-            queryset = queryset.filter(category__iexact=category)
+        queryset = self.prune_queryset(InventoryItem.objects.all())
+        return filter_inventory_items(queryset, self.request.query_params)
+
+class LowStockItemListView(SparseFieldsetViewMixin, ListAPIView):
+    """Items at or below their reorder threshold, served from a partial index."""
+    serializer_class = InventoryItemSerializer
+    pagination_class = InventoryItemCursorPagination
+    permission_classes = [IsAuthenticated]
+    sparse_field_columns = {'supplier': ['name']}
+    sparse_field_related = {'supplier': 'supplier'}
+
+    def get_queryset(self):
+        queryset = self.prune_queryset(InventoryItem.objects.filter(is_low_stock=True))
+        return filter_inventory_items(queryset, self.request.query_params)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def category_thresholds(request):
+    if request.method == 'GET':
+        return Response({
+            'success': True,
+            'thresholds': dict(CategoryThreshold.objects.values_list('category', 'reorder_threshold'))
+        }, status=status.HTTP_200_OK)
+
+    if not check_admin_permission(request.user):
+        return Response({
+            'error': 'Permission denied',
+            'message': 'Only admins can change reorder thresholds'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    category = (request.data.get('category') or '').strip()
+    threshold = request.data.get('reorder_threshold')
+    try:
+        threshold = None if threshold in (None, '') else int(threshold)
+        if threshold is not None and threshold < 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return Response({
+            'error': 'Validation failed',
+            'details': {'reorder_threshold': ['Must be a non-negative integer, or null to remove it.']}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        with transaction.atomic():
+            if threshold is None:
+                CategoryThreshold.objects.filter(category=category).delete()
+            else:
+                CategoryThreshold.objects.update_or_create(
+                    category=category, defaults={'reorder_threshold': threshold}
+                )
+            entered, cleared = evaluate_category(category)
+
+        return Response({
+            'success': True,
+            'category': category,
+            'reorder_threshold': threshold,
+            'entered': len(entered),
+            'cleared': len(cleared)
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': 'Failed to update threshold',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        if supplier:
-            queryset = queryset.filter(supplier__name__iexact=supplier)
-       
-        if search:
-            queryset = queryset.filter(
-                Q(item_name__icontains=search) | Q(sku__icontains=search)
-            )
-        return queryset
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_inventory_item(request, id):
     try:
-        item = get_object_or_404(InventoryItem, id=id)
-        serializer = InventoryItemSerializer(item)
+        data = item_detail_cache.get(id, lambda: dict(InventoryItemSerializer(
+            get_object_or_404(InventoryItem.objects.select_related('supplier'), id=id)
+        ).data))
         
-        return Response({
+        response = Response({
             'success': True,
-            'item': serializer.data
+            'item': data
         }, status=status.HTTP_200_OK)
+        response['ETag'] = etag(data['version'])
+        return response
         
     except Exception as e:
         return Response({
@@ -89,23 +252,118 @@ def get_inventory_item(request, id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def lookup_inventory_items(request):
+    skus = request.query_params.getlist('sku')
+    raw_ids = [value for param in request.query_params.getlist('ids') for value in param.split(',') if value]
+
+    try:
+        ids = [int(value) for value in raw_ids]
+    except ValueError:
+        return Response({
+            'error': 'Invalid ids',
+            'details': 'ids must be a comma-separated list of integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    keys = list(dict.fromkeys([('sku', sku) for sku in skus] + [('id', pk) for pk in ids]))
+    max_keys = getattr(settings, 'ITEM_LOOKUP_MAX_KEYS', 500)
+    if not keys:
+        return Response({
+            'error': 'Nothing to look up',
+            'details': 'Pass one or more sku parameters or an ids list'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(keys) > max_keys:
+        return Response({
+            'error': 'Too many keys',
+            'details': f'At most {max_keys} SKUs and ids can be looked up at once'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    found = item_lookup_cache.get_many(keys)
+    missing_skus = [value for kind, value in keys if kind == 'sku' and (kind, value) not in found]
+    missing_ids = [value for kind, value in keys if kind == 'id' and (kind, value) not in found]
+
+    if missing_skus or missing_ids:
+        queryset = InventoryItem.objects.select_related('supplier').filter(
+            Q(sku__in=missing_skus) | Q(id__in=missing_ids)
+        )
+        fetched = {}
+        for item in queryset:
+            data = InventoryItemSerializer(item).data
+            fetched[('sku', item.sku)] = data
+            fetched[('id', item.id)] = data
+        item_lookup_cache.set_many(fetched)
+        found.update(fetched)
+
+    return Response({
+        'success': True,
+        'items': [found[key] for key in keys if key in found],
+        'missing': {
+            'skus': [value for kind, value in keys if kind == 'sku' and (kind, value) not in found],
+            'ids': [value for kind, value in keys if kind == 'id' and (kind, value) not in found]
+        }
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def update_inventory_item(request, id):
     try:
-        item = get_object_or_404(InventoryItem, id=id)
-        serializer = InventoryItemSerializer(item, data=request.data, partial=True)
+        versions = if_match_versions(request)
+        # The row is locked until commit, so the ledger deltas below are
+        # computed from the values this update actually replaces.
+        with transaction.atomic():
+            item = get_object_or_404(InventoryItem.objects.select_for_update(), id=id)
+            if versions is not None and item.version not in versions:
+                return precondition_failed(item)
+            old_quantity = item.quantity
+            old_value = stock_value(item)
+            old_category = item.category or ''
+            old_sku = item.sku
+            old_supplier_id = item.supplier_id
+            serializer = InventoryItemSerializer(item, data=request.data, partial=True)
         
-        if serializer.is_valid():
-            updated_item = serializer.save()
-            log_transaction('update', updated_item.item_name, request.user, "Updated")
-            result = InventoryItemSerializer(updated_item)
+            if serializer.is_valid():
+                updated_item = versioned_update(item, serializer.validated_data, versions)
+                if updated_item is None:
+                    return precondition_failed(item)
+                entered, cleared = evaluate_items([updated_item.id])
+                if entered or cleared:
+                    updated_item.refresh_from_db(fields=LOW_STOCK_FIELDS)
+                item_changed(
+                    updated_item.id,
+                    skus=[old_sku, updated_item.sku],
+                    supplier_ids=[old_supplier_id, updated_item.supplier_id]
+                )
+                if (updated_item.category or '') == old_category:
+                    log_transaction(
+                        'update', updated_item, request.user, "Updated",
+                        quantity_delta=updated_item.quantity - old_quantity,
+                        value_delta=stock_value(updated_item) - old_value
+                    )
+                else:
+                    # A category move leaves one category and enters another, so
+                    # it is ledgered as an outflow plus an inflow.
+                    log_transaction(
+                        'update', updated_item, request.user, f"Moved out of {old_category or 'Uncategorized'}",
+                        quantity_delta=-old_quantity, value_delta=-old_value,
+                        item_count_delta=-1, category=old_category
+                    )
+                    log_transaction(
+                        'update', updated_item, request.user, "Updated",
+                        quantity_delta=updated_item.quantity, value_delta=stock_value(updated_item),
+                        item_count_delta=1
+                    )
+                result = InventoryItemSerializer(updated_item)
             
-            return Response({
-                'success': True,
-                'message': 'Item updated successfully',
-                'item': result.data
-            }, status=status.HTTP_200_OK)
+                response = Response({
+                    'success': True,
+                    'message': 'Item updated successfully',
+                    'item': result.data
+                }, status=status.HTTP_200_OK)
+                response['ETag'] = etag(updated_item.version)
+                return response
         
         return Response({
             'error': 'Validation failed',
@@ -129,9 +387,17 @@ def delete_inventory_item(request, id):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        item = get_object_or_404(InventoryItem, id=id)
-        log_transaction('delete', item.item_name, request.user, f"Removed SKU {item.sku}")
-        item.delete()
+        with transaction.atomic():
+            item = get_object_or_404(InventoryItem.objects.select_for_update(), id=id)
+            log_transaction(
+                'delete', item, request.user, f"Removed SKU {item.sku}",
+                quantity_delta=-item.quantity, value_delta=-stock_value(item), item_count_delta=-1
+            )
+            item_id = item.id
+            item.delete()
+            # Runs on commit, once the row is gone, so a concurrent read
+            # cannot cache the deleted item again.
+            item_changed(item_id, skus=[item.sku], supplier_ids=[item.supplier_id])
         
         return Response({
             'success': True,
@@ -145,16 +411,103 @@ def delete_inventory_item(request, id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def bulk_update_inventory_items(request):
+    queryset, error = parse_selection(request.data)
+    if error:
+        return Response({
+            'error': 'Invalid selection',
+            'details': error
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    changes = request.data.get('set')
+    if not isinstance(changes, dict) or not changes:
+        return Response({
+            'error': 'Nothing to update',
+            'details': 'Pass the fields to change in set: ' + ', '.join(BULK_UPDATE_FIELDS)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    unknown = sorted(set(changes) - set(BULK_UPDATE_FIELDS))
+    if unknown:
+        return Response({
+            'error': 'Validation failed',
+            'details': {name: ['This field cannot be bulk updated.'] for name in unknown}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = InventoryItemSerializer(data=changes, partial=True)
+    if not serializer.is_valid():
+        return Response({
+            'error': 'Validation failed',
+            'details': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        if is_dry_run(request.data):
+            return Response({'success': True, 'dry_run': True, 'matched': queryset.count()})
+
+        updated = bulk_update_items(queryset, serializer.validated_data, request.user)
+        return Response({
+            'success': True,
+            'dry_run': False,
+            'updated': updated
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': 'Failed to update items',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent
+def bulk_delete_inventory_items(request):
+    if not check_admin_permission(request.user):
+        return Response({
+            'error': 'Permission denied',
+            'message': 'Only admins can delete inventory items'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    queryset, error = parse_selection(request.data)
+    if error:
+        return Response({
+            'error': 'Invalid selection',
+            'details': error
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        if is_dry_run(request.data):
+            return Response({'success': True, 'dry_run': True, 'matched': queryset.count()})
+
+        deleted = bulk_delete_items(queryset, request.user)
+        return Response({
+            'success': True,
+            'dry_run': False,
+            'deleted': deleted
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': 'Failed to delete items',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 #supplier
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def add_supplier(request):
     serializer = SupplierSerializer(data=request.data)
     if serializer.is_valid():
         try:
             supplier = serializer.save()
             result = SupplierSerializer(supplier)
-            return Response(result.data, status=status.HTTP_201_CREATED)
+            response = Response(result.data, status=status.HTTP_201_CREATED)
+            response['ETag'] = etag(supplier.version)
+            return response
         
         except Exception as e:
             return Response({
@@ -168,13 +521,14 @@ def add_supplier(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class SupplierListView(ListAPIView):
+class SupplierListView(SparseFieldsetViewMixin, ListAPIView):
     serializer_class = SupplierSerializer
     pagination_class = InventoryItemCursorPagination
     permission_classes = [IsAuthenticated]
+    sparse_field_columns = {'linked_items': []}
     
     def get_queryset(self):
-        queryset = Supplier.objects.all()
+        queryset = self.prune_queryset(Supplier.objects.all())
         search = self.request.query_params.get('search')
         
         if search:
@@ -186,13 +540,16 @@ class SupplierListView(ListAPIView):
 @permission_classes([IsAuthenticated])
 def get_supplier(request, id):
     try:
-        supplier = get_object_or_404(Supplier, id=id)
-        serializer = SupplierSerializer(supplier)
+        data = supplier_detail_cache.get(id, lambda: dict(SupplierSerializer(
+            get_object_or_404(Supplier, id=id)
+        ).data))
         
-        return Response({
+        response = Response({
             'success': True,
-            'supplier': serializer.data
+            'supplier': data
         }, status=status.HTTP_200_OK)
+        response['ETag'] = etag(data['version'])
+        return response
         
     except Exception as e:
         return Response({
@@ -203,20 +560,29 @@ def get_supplier(request, id):
 
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def update_supplier(request, id):
     try:
+        versions = if_match_versions(request)
         supplier = get_object_or_404(Supplier, id=id)
+        if versions is not None and supplier.version not in versions:
+            return precondition_failed(supplier)
         serializer = SupplierSerializer(supplier, data=request.data, partial=True)
         
         if serializer.is_valid():
-            updated_supplier = serializer.save()
+            updated_supplier = versioned_update(supplier, serializer.validated_data, versions)
+            if updated_supplier is None:
+                return precondition_failed(supplier)
+            supplier_changed(updated_supplier.id)
             result = SupplierSerializer(updated_supplier)
             
-            return Response({
+            response = Response({
                 'success': True,
                 'message': 'Supplier updated successfully',
                 'supplier': result.data
             }, status=status.HTTP_200_OK)
+            response['ETag'] = etag(updated_supplier.version)
+            return response
         
         return Response({
             'error': 'Validation failed',
@@ -241,45 +607,69 @@ def delete_supplier(request, id):
     
     try:
         supplier = get_object_or_404(Supplier, id=id)
-        supplier_name = supplier.name
-        supplier.delete()
+        # Items are deleted (and ledgered) in batches by a background job.
+        job = schedule_supplier_deletion(supplier, request.user)
         
         return Response({
             'success': True,
-            'message': f'Supplier "{supplier_name}" deleted successfully'
-        }, status=status.HTTP_200_OK)
+            'message': f'Deletion of supplier "{supplier.name}" started',
+            'job': SupplierDeletionJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
         
     except Exception as e:
         return Response({
             'error': 'Failed to delete supplier',
             'details': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_supplier_deletion_job(request, job_id):
+    if not request.user.is_superuser:
+        return Response({
+            'error': 'Permission denied',
+            'message': 'Only admins can view supplier deletions'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        job = get_object_or_404(SupplierDeletionJob, id=job_id)
+        return Response({
+            'success': True,
+            'job': SupplierDeletionJobSerializer(job).data
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            'error': 'Deletion job not found',
+            'details': str(e)
+        }, status=status.HTTP_404_NOT_FOUND)
     
 
-class TransactionListView(ListAPIView):
+class TransactionListView(SparseFieldsetViewMixin, ListAPIView):
     serializer_class = TransactionSerializer
     pagination_class = InventoryItemCursorPagination 
     permission_classes = [IsAuthenticated]
+    sparse_field_columns = {
+        'formatted_date': ['created_at'],
+        'transaction_type_display': ['transaction_type'],
+    }
     
     def get_queryset(self):
-        queryset = Transaction.objects.all()
-        transaction_type = self.request.query_params.get('type')
-        search = self.request.query_params.get('search')
-       
-        if transaction_type:
-            queryset = queryset.filter(transaction_type=transaction_type)
-       
-        if search:
-            queryset = queryset.filter(
-                Q(item_name__icontains=search) | Q(details__icontains=search)
-            )
-            
-        return queryset
-    
+        return filter_transactions(self.prune_queryset(Transaction.objects.all()), self.request.query_params)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_reports_data(request):
+def export_transactions_csv(request):
+    """The filtered transaction feed (`type`, `search`) as a streamed CSV."""
+    queryset = filter_transactions(Transaction.objects.all(), request.query_params)
+    response = StreamingHttpResponse(csv_lines(queryset), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
+    return response
+
+
+def build_reports_data():
     total_value = InventoryItem.objects.aggregate(
         total=Sum(F('price') * F('quantity'))
     )['total'] or 0
@@ -308,99 +698,301 @@ def get_reports_data(request):
             'percentage': round((count / total_items) * 100) if total_items else 0
         })
 
-    return Response({
+    return {
         'total_value': round(float(total_value), 2),
         'category_values': category_values,
         'category_breakdown': breakdown
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_reports_data(request):
+    return Response(report_cache.get('reports_data', build_reports_data))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_inventory_analytics(request):
+    abc_class = request.query_params.get('abc_class')
+    sort = request.query_params.get('sort', 'days_of_cover')
+    needs_reorder = request.query_params.get('needs_reorder') in ('1', 'true')
+
+    if abc_class and abc_class not in ('A', 'B', 'C'):
+        return Response({
+            'error': 'Invalid abc_class',
+            'details': 'abc_class must be one of A, B or C'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if sort not in ('days_of_cover', 'usage_value'):
+        return Response({
+            'error': 'Invalid sort',
+            'details': 'sort must be days_of_cover or usage_value'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 100)), 1000))
+    except ValueError:
+        return Response({
+            'error': 'Invalid limit',
+            'details': 'limit must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Imported here so workers don't load numpy until analytics is asked for.
+    from . import analytics
+
+    metrics = analytics.get_inventory_analytics()
+
+    return Response({
+        'summary': analytics.summarize(metrics),
+        'items': analytics.select_rows(
+            metrics, abc_class=abc_class, needs_reorder=needs_reorder, sort=sort, limit=limit
+        )
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def export_reports_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="inventory_report.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Report Type', 'Category', 'Items Count', 'Total Value'])
-    items = InventoryItem.objects.all()
-    totals = items.aggregate(
-        total_items=Count('id'),
-        total_value=Sum(F('price') * F('quantity'))
-    )
-    writer.writerow([
-        'Summary',
-        'All Items',
-        totals['total_items'] or 0,
-        f"${totals['total_value'] or 0:.2f}"
-    ])
-    writer.writerow([])
-    writer.writerow(['Individual Items', '', '', ''])
-    writer.writerow(['Item Name', 'SKU', 'Category', 'Quantity', 'Price', 'Total Value'])
-    
-    for item in items:
-        writer.writerow([
-            item.item_name,
-            item.sku,
-            item.category or 'Uncategorized',
-            item.quantity,
-            f"${item.price}",
-            f"${float(item.price) * item.quantity:.2f}"
-        ])
-    
+def get_reports_trend(request):
+    try:
+        end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else timezone.localdate()
+        start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else end - timedelta(days=365)
+    except ValueError:
+        return Response({
+            'error': 'Invalid date range',
+            'details': 'start and end must be in YYYY-MM-DD format'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if start > end:
+        return Response({
+            'error': 'Invalid date range',
+            'details': 'start must not be after end'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'points': trend(start, end, category=request.query_params.get('category'))
+    })
+
+
+def render_export(name):
+    backend = get_backend(name)
+    if backend.streaming:
+        return FileResponse(
+            backend.render_file(), as_attachment=True, filename=backend.filename, content_type=backend.content_type
+        )
+    content = report_cache.get(f'reports_{name}', backend.render)
+    response = HttpResponse(content, content_type=backend.content_type)
+    response['Content-Disposition'] = f'attachment; filename="{backend.filename}"'
     return response
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_reports_csv(request):
+    return render_export('csv')
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def export_reports_pdf(request):
-    items = InventoryItem.objects.all()
-    total_items = items.count()
-    total_value = InventoryItem.objects.aggregate(
-        total=Sum(F('price') * F('quantity'))
-    )['total'] or 0
+    try:
+        return render_export('pdf')
+    except ValueError:
+        return HttpResponse("Error generating PDF", status=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_report(request, export_format):
+    try:
+        return render_export(export_format)
+    except UnknownExportFormat:
+        return Response({
+            'error': 'Unknown export format',
+            'details': f"Available formats: {', '.join(sorted(export_registry()))}"
+        }, status=status.HTTP_404_NOT_FOUND)
+    except ImportError as e:
+        return Response({
+            'error': 'Export format unavailable',
+            'details': f"The {export_format} export needs a package that is not installed: {e.name}"
+        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+    except ValueError as e:
+        return Response({
+            'error': 'Failed to export report',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    html = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; }}
-            h1 {{ text-align: center; }}
-            table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
-            th, td {{ border: 1px solid #333; padding: 8px; text-align: left; }}
-        </style>
-    </head>
-    <body>
-        <h1>Inventory Report</h1>
-        <p><b>Total Items:</b> {total_items}</p>
-        <p><b>Total Value:</b> ${total_value:.2f}</p>
-        <br/>
-        <table>
-            <tr>
-                <th>Item Name</th>
-                <th>SKU</th>
-                <th>Category</th>
-                <th>Quantity</th>
-                <th>Price</th>
-                <th>Total Value</th>
-            </tr>
-            {''.join([
-                f"<tr><td>{i.item_name}</td><td>{i.sku}</td><td>{i.category or 'Uncategorized'}</td><td>{i.quantity}</td><td>${i.price}</td><td>${float(i.price) * i.quantity:.2f}</td></tr>"
-                for i in items
-            ])}
-        </table>
-    </body>
-    </html>
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_table(request, table):
+    """Stream `items`, `suppliers` or `transactions` as Parquet or Arrow IPC
+    (`?output=parquet|arrow`).
+
+    `?since=<watermark>` limits the export to rows changed after a previous
+    export; the X-Export-Watermark response header is the next `since`.
     """
+    try:
+        # Imported here so pyarrow is only loaded by workers serving exports.
+        from .export_backends import columnar
+    except ImportError:
+        return Response({
+            'error': 'Columnar export unavailable',
+            'details': "Parquet and Arrow exports require the 'pyarrow' package"
+        }, status=status.HTTP_501_NOT_IMPLEMENTED)
 
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename="inventory_report.pdf"'
-    
-    pisa_status = pisa.CreatePDF(io.StringIO(html), dest=response)
+    # Not `format`: DRF reserves that for renderer selection.
+    export_format = request.query_params.get('output', 'parquet')
+    if table not in columnar.TABLES or export_format not in columnar.FORMATS:
+        return Response({
+            'error': 'Unknown export',
+            'details': f"Tables: {', '.join(columnar.TABLES)}; outputs: {', '.join(columnar.FORMATS)}"
+        }, status=status.HTTP_404_NOT_FOUND)
 
-    if pisa_status.err:
-        return HttpResponse("Error generating PDF", status=500)
-    
+    since = request.query_params.get('since')
+    if since:
+        since = parse_datetime(since)
+        if since is None:
+            return Response({
+                'error': 'Invalid since',
+                'details': 'since must be an ISO 8601 timestamp, e.g. a previous X-Export-Watermark'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(since):
+            since = since.replace(tzinfo=dt_timezone.utc)
+
+    queryset, watermark = columnar.export_window(table, since or None)
+    content_type, extension = columnar.FORMATS[export_format]
+    response = StreamingHttpResponse(columnar.stream(table, queryset, export_format), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{table}.{extension}"'
+    if watermark is not None:
+        response['X-Export-Watermark'] = watermark.isoformat()
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_request_profiles(request):
+    if not check_admin_permission(request.user):
+        return Response({
+            'error': 'Permission denied',
+            'message': 'Only admins can view request profiles'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    return Response({
+        'success': True,
+        'profiles': list_profiles()
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_request_profile(request, profile_id):
+    """The stored profile as JSON, or `?output=collapsed` for flame graph tools."""
+    if not check_admin_permission(request.user):
+        return Response({
+            'error': 'Permission denied',
+            'message': 'Only admins can view request profiles'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    profile = load_profile(profile_id)
+    if profile is None:
+        return Response({
+            'error': 'Profile not found',
+            'details': f'No stored profile {profile_id}'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    if request.query_params.get('output') == 'collapsed':
+        response = HttpResponse(collapsed_stacks(profile), content_type='text/plain')
+        response['Content-Disposition'] = f'attachment; filename="{profile_id}.folded"'
+        return response
+
+    response = HttpResponse(json.dumps(profile), content_type='application/json')
+    response['Content-Disposition'] = f'attachment; filename="{profile_id}.json"'
     return response
 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_slow_queries(request):
+    """Recent slow queries, or `?group=fingerprint` for the costliest query shapes."""
+    if not check_admin_permission(request.user):
+        return Response({
+            'error': 'Permission denied',
+            'message': 'Only admins can view slow queries'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        limit = min(int(request.query_params.get('limit', 50)), 500)
+    except ValueError:
+        return Response({
+            'error': 'Invalid limit',
+            'details': 'limit must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset = SlowQuery.objects.all()
+    view_name = request.query_params.get('view')
+    if view_name:
+        queryset = queryset.filter(view_name__icontains=view_name)
+    since = request.query_params.get('since')
+    if since:
+        parsed = parse_datetime(since)
+        if parsed is None:
+            return Response({
+                'error': 'Invalid since',
+                'details': 'since must be an ISO 8601 timestamp'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        queryset = queryset.filter(created_at__gte=parsed)
+
+    if request.query_params.get('group') == 'fingerprint':
+        return Response({
+            'success': True,
+            'groups': slow_queries.top_fingerprints(queryset, limit)
+        }, status=status.HTTP_200_OK)
+
+    serializer = SlowQuerySerializer(queryset.defer('plan')[:limit], many=True)
+    return Response({
+        'success': True,
+        'threshold_ms': slow_queries.threshold_ms(),
+        'slow_queries': serializer.data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_slow_query(request, query_id):
+    if not check_admin_permission(request.user):
+        return Response({
+            'error': 'Permission denied',
+            'message': 'Only admins can view slow queries'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    slow_query = get_object_or_404(SlowQuery, id=query_id)
+    return Response({
+        'success': True,
+        'slow_query': SlowQuerySerializer(slow_query).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_metrics(request):
+    if not check_admin_permission(request.user):
+        return Response({
+            'error': 'Permission denied',
+            'message': 'Only admins can view metrics'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    return Response({
+        'report_cache': report_cache.stats(),
+        'item_lookup_cache': item_lookup_cache.stats(),
+        'item_detail_cache': item_detail_cache.stats(),
+        'supplier_detail_cache': supplier_detail_cache.stats(),
+        'idempotency': idempotency.stats(),
+        'db_pool': pool_stats(),
+        'slow_queries': slow_queries.stats(),
+        'password_hashing': hashing.stats(),
+        'export_backends_loaded': loaded_backends()
+    })
+
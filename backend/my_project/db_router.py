@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+_read_alias = ContextVar('read_alias', default=None)
+
+_lag_lock = threading.Lock()
+_lag_samples = {}
+
+
+def pin_to_primary():
+    _pinned_to_primary.set(True)
+
+
+def is_pinned_to_primary():
+    return _pinned_to_primary.get()
+
+
+@contextmanager
+def primary_only(pinned=True):
+    token = _pinned_to_primary.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(token)
+
+
+@contextmanager
+def reads_from(alias):
+    """Send every read in the block to `alias`, e.g. to read a version
+    stamp and the data it describes from the same replica."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def measure_replica_lag(alias):
+    """Seconds the replica is behind the primary, or None if unreachable."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+            )
+            lag = cursor.fetchone()[0]
+    except Exception:
+        return None
+    return float(lag or 0)
+
+
+def replica_lag(alias):
+    interval = getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+    with _lag_lock:
+        sample = _lag_samples.get(alias)
+        if sample is not None and now - sample[1] < interval:
+            return sample[0]
+    lag = measure_replica_lag(alias)
+    with _lag_lock:
+        _lag_samples[alias] = (lag, now)
+    return lag
+
+
+def healthy_replicas():
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+    healthy = []
+    for alias in getattr(settings, 'REPLICA_DATABASES', []):
+        lag = replica_lag(alias)
+        if lag is not None and lag <= max_lag:
+            healthy.append(alias)
+    return healthy
+
+
+def choose_read_alias():
+    """The database a read would go to right now."""
+    if is_pinned_to_primary():
+        return 'default'
+    alias = _read_alias.get()
+    if alias is not None:
+        return alias
+    replicas = healthy_replicas()
+    if not replicas:
+        return 'default'
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    """Send reads to an in-sync replica and everything else to `default`.
+
+    Reads stay on the primary while the current request is pinned (see
+    ReplicaPinningMiddleware) so a client always sees its own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        return choose_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'REPLICA_DATABASES', [])
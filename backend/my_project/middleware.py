@@ -0,0 +1,369 @@
+import random
+import zlib
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.cache import patch_vary_headers
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .db_router import primary_only
+from .profiling import RequestProfile, save_profile
+from .slow_queries import current_path, current_view
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaPinningMiddleware:
+    """Pin writes, and reads shortly after a client's write, to the primary.
+
+    A write request sets a short-lived cookie; while it is present the
+    client's reads skip the replicas, so replication lag never hides the
+    client's own changes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cookie_name = getattr(settings, 'REPLICA_PIN_COOKIE_NAME', 'db_primary_pin')
+        is_write = request.method not in SAFE_METHODS
+        pinned = is_write or cookie_name in request.COOKIES
+
+        with primary_only(pinned):
+            response = self.get_response(request)
+
+        if is_write and getattr(settings, 'REPLICA_DATABASES', []):
+            response.set_cookie(
+                cookie_name,
+                '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10),
+                httponly=True,
+                samesite=getattr(settings, 'SESSION_COOKIE_SAMESITE', 'Lax'),
+            )
+        return response
+
+
+class QueryContextMiddleware:
+    """Tag the request's SQL with its view, for the slow-query log."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path_token = current_path.set(request.path)
+        view_token = current_view.set('')
+        try:
+            return self.get_response(request)
+        finally:
+            current_path.reset(path_token)
+            current_view.reset(view_token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        current_view.set(f'{view.__module__}.{view.__name__}')
+
+
+def uses_lean_stack(request):
+    """True for paths under LEAN_MIDDLEWARE_PATHS, which skip the
+    browser-only middleware below."""
+    return request.path_info.startswith(tuple(getattr(settings, 'LEAN_MIDDLEWARE_PATHS', ())))
+
+
+class LeanPathMixin:
+    """Pass requests on lean paths straight through this middleware.
+
+    The API authenticates with tokens (header or auth cookie) and renders
+    JSON, so sessions, CSRF cookies, flash messages and frame headers are
+    dead weight there; /admin/ still gets the full stack. These are
+    subclasses so Django's admin checks still find the middleware.
+    """
+
+    def __call__(self, request):
+        if uses_lean_stack(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class LeanSessionMiddleware(LeanPathMixin, SessionMiddleware):
+    pass
+
+
+class LeanCsrfViewMiddleware(LeanPathMixin, CsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if uses_lean_stack(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class LeanAuthenticationMiddleware(LeanPathMixin, AuthenticationMiddleware):
+
+    def __call__(self, request):
+        if uses_lean_stack(request):
+            # No session to read a user from; DRF's authenticators replace this.
+            request.user = AnonymousUser()
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class LeanMessageMiddleware(LeanPathMixin, MessageMiddleware):
+    pass
+
+
+class LeanXFrameOptionsMiddleware(LeanPathMixin, XFrameOptionsMiddleware):
+    pass
+
+
+class GzipEncoder:
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def chunk(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def chunk(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def chunk(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+# Default compression level per encoding; COMPRESSION_LEVELS overrides them.
+ENCODERS = {
+    'zstd': (ZstdEncoder, 3),
+    'br': (BrotliEncoder, 4),
+    'gzip': (GzipEncoder, 6),
+}
+
+
+def available_encodings():
+    configured = getattr(settings, 'COMPRESSION_ENCODINGS', ['zstd', 'br', 'gzip'])
+    installed = {'zstd': zstandard is not None, 'br': brotli is not None, 'gzip': True}
+    return [name for name in configured if installed.get(name)]
+
+
+def negotiate_encoding(accept_encoding):
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    candidates = [
+        (accepted.get(name, accepted.get('*', 0.0)), -index, name)
+        for index, name in enumerate(available_encodings())
+    ]
+    candidates = [candidate for candidate in candidates if candidate[0] > 0]
+    if not candidates:
+        return None
+    return max(candidates)[2]
+
+
+class CompressionMiddleware:
+    """Compress responses with zstd, brotli or gzip per Accept-Encoding.
+
+    Small bodies and already-compressed content types are left alone.
+    Streaming responses are compressed chunk by chunk as they are
+    produced, so large exports are never buffered.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.compress(request, response)
+
+    def should_skip(self, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return True
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        excluded = getattr(settings, 'COMPRESSION_EXCLUDED_TYPES', [
+            'application/pdf', 'application/zip', 'application/gzip', 'application/x-7z-compressed',
+            'application/vnd.openxmlformats-officedocument', 'application/vnd.apache.parquet',
+            'image/', 'audio/', 'video/',
+        ])
+        if any(content_type.startswith(prefix) for prefix in excluded):
+            return True
+        if not response.streaming:
+            return len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        return False
+
+    def compress(self, request, response):
+        if self.should_skip(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        encoder_class, default_level = ENCODERS[encoding]
+        level = getattr(settings, 'COMPRESSION_LEVELS', {}).get(encoding, default_level)
+        encoder = encoder_class(level)
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(encoder, response.streaming_content)
+            else:
+                response.streaming_content = self.compress_stream(encoder, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = encoder.chunk(response.content) + encoder.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def compress_stream(encoder, chunks):
+        buffer = StreamBuffer()
+        for chunk in chunks:
+            if buffer.add(chunk):
+                data = encoder.chunk(buffer.take())
+                if data:
+                    yield data
+        yield encoder.compress(buffer.take()) + encoder.finish()
+
+    @staticmethod
+    async def compress_async_stream(encoder, chunks):
+        buffer = StreamBuffer()
+        async for chunk in chunks:
+            if buffer.add(chunk):
+                data = encoder.chunk(buffer.take())
+                if data:
+                    yield data
+        yield encoder.compress(buffer.take()) + encoder.finish()
+
+
+class StreamBuffer:
+    """Collects streamed chunks until COMPRESSION_STREAM_BUFFER bytes.
+
+    Every flush ends a compression block and resets part of the
+    encoder's state, so flushing per small chunk (one CSV row, say)
+    makes the output several times larger than compressing it whole.
+    """
+
+    def __init__(self):
+        self.limit = getattr(settings, 'COMPRESSION_STREAM_BUFFER', 32 * 1024)
+        self.chunks = []
+        self.size = 0
+
+    def add(self, chunk):
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        return self.size >= self.limit
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+def is_superuser_token(request):
+    """Whether the request carries the API token of a superuser.
+
+    Checked before the view runs (and before DRF authenticates), so a
+    profile is only ever started for an admin.
+    """
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b'token':
+        return False
+    try:
+        user, _ = TokenAuthentication().authenticate_credentials(auth[1].decode())
+    except (AuthenticationFailed, UnicodeError):
+        return False
+    return user.is_superuser
+
+
+class ProfilingMiddleware:
+    """Opt-in sampling profiler for production diagnosis.
+
+    With PROFILER_ENABLED, a request is profiled when it carries the
+    X-Profile header and a superuser's API token, or is picked by
+    PROFILER_SAMPLE_RATE. The header is ignored for anyone else, so
+    clients cannot make the server pay for profiling. The stack samples
+    and SQL timings are written under PROFILER_DIR. When disabled the
+    middleware is dropped from the chain entirely.
+
+    Samples are taken from the thread running the middleware, which is
+    the one running the view under WSGI.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if 'HTTP_X_PROFILE' in request.META and is_superuser_token(request):
+            trigger = 'header'
+        elif random.random() < getattr(settings, 'PROFILER_SAMPLE_RATE', 0.0):
+            trigger = 'sample'
+        else:
+            return self.get_response(request)
+
+        with RequestProfile() as profile:
+            response = self.get_response(request)
+
+        response['X-Profile-Id'] = save_profile(profile, request, response, trigger)
+        return response
@@ -0,0 +1,36 @@
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.base import IsolationLevel
+
+from .pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend that borrows connections from a process-wide pool
+    instead of opening a new one per request. Pool sizing comes from the
+    POOL entry of the database settings."""
+
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        def connect():
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        pool = self.pool()
+        pool.fill(connect)
+        # Fresh connections set this in the parent class; pooled ones are
+        # reused as-is so it is set here as well.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return pool.getconn(connect)
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                if self.in_atomic_block:
+                    # Django keeps self.connection when closing inside
+                    # atomic(), so it must not go back to the pool.
+                    self.pool().discard(self.connection)
+                else:
+                    self.pool().putconn(self.connection)
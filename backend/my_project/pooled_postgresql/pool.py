@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from collections import deque
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """Thread-safe pool of raw psycopg2 connections.
+
+    Django keeps one connection per thread (including the thread that
+    sync_to_async uses under ASGI), so connections are checked out when
+    Django connects and returned when it closes them at the end of a
+    request. Connections idle for longer than `check_after` seconds are
+    pinged with `SELECT 1` before being handed out again.
+    """
+
+    def __init__(self, min_size=0, max_size=10, timeout=5.0, check_after=30.0, max_idle=600.0):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_idle = max_idle
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._stats = dict.fromkeys((
+            'checkouts', 'waits', 'timeouts', 'connections_created',
+            'connections_closed', 'health_check_failures'
+        ), 0)
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def discard(self, conn):
+        """Close `conn` instead of returning it to the pool."""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats['connections_closed'] += 1
+            self._cond.notify()
+
+    def _ping(self, conn):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def fill(self, connect):
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._stats['connections_created'] += 1
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self, connect):
+        started = time.monotonic()
+        waited = False
+
+        while True:
+            conn = None
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = self.timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.timeout}s waiting for a database connection "
+                            f"(pool max_size={self.max_size})"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                else:
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['connections_created'] += 1
+                break
+
+            idle_for = time.monotonic() - returned_at
+            if conn.closed or idle_for > self.max_idle or (idle_for > self.check_after and not self._ping(conn)):
+                with self._cond:
+                    self._stats['health_check_failures'] += 1
+                self.discard(conn)
+                continue
+            break
+
+        wait = time.monotonic() - started
+        with self._cond:
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+        return conn
+
+    def putconn(self, conn):
+        if conn.closed:
+            self.discard(conn)
+            return
+
+        # A connection returned mid-transaction may still be referenced by
+        # its thread; only an idle one is safe to hand to another thread.
+        if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            self.discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self.discard(conn)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            idle = len(self._idle)
+            stats.update({
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'saturation': round((self._size - idle) / self.max_size, 3),
+                'wait_time_avg': round(self._wait_total / stats['waits'], 4) if stats['waits'] else 0.0,
+                'wait_time_max': round(self._wait_max, 4),
+            })
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    """Return the pool for a database alias, creating it on first use.
+
+    A pool inherited across fork() holds the parent's sockets, so a child
+    process always starts a fresh one.
+    """
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.pid != os.getpid():
+            pool = _pools[alias] = ConnectionPool(
+                min_size=options.get('MIN_SIZE', 0),
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 5.0),
+                check_after=options.get('CHECK_AFTER', 30.0),
+                max_idle=options.get('MAX_IDLE', 600.0),
+            )
+        return pool
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
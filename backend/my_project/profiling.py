@@ -0,0 +1,170 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+PROFILE_ID_RE = re.compile(r'^[\w-]+$')
+
+
+class SamplingProfiler:
+    """Statistical profiler for one thread.
+
+    A helper thread wakes every `interval` seconds and records the target
+    thread's current stack, so the cost is per sample, not per call.
+    Stacks are kept collapsed ("outer;inner" -> count), the format
+    flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+
+class QueryRecorder:
+    """execute_wrapper that times every SQL statement on a connection."""
+
+    def __init__(self, alias, queries, limit):
+        self.alias = alias
+        self.queries = queries
+        self.limit = limit
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.queries) < self.limit:
+                self.queries.append({
+                    'alias': self.alias,
+                    'sql': sql,
+                    'many': many,
+                    'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+                })
+
+
+class RequestProfile:
+    """Sampled stacks and SQL for the duration of a `with` block."""
+
+    def __init__(self):
+        self.profiler = SamplingProfiler(getattr(settings, 'PROFILER_INTERVAL', 0.005))
+        self.queries = []
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        limit = getattr(settings, 'PROFILER_MAX_QUERIES', 1000)
+        for alias in connections:
+            self._stack.enter_context(
+                connections[alias].execute_wrapper(QueryRecorder(alias, self.queries, limit))
+            )
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.profiler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.stop()
+        self.duration = time.perf_counter() - self._start
+        self._stack.close()
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILER_DIR', settings.BASE_DIR / 'profiles'))
+
+
+def save_profile(profile, request, response, trigger):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = time.strftime('%Y%m%dT%H%M%S', time.gmtime(profile.started_at)) + '-' + uuid.uuid4().hex[:8]
+    user = getattr(request, 'user', None)
+    data = {
+        'id': profile_id,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'trigger': trigger,
+        'user': user.username if user is not None and user.is_authenticated else None,
+        'started_at': profile.started_at,
+        'duration_ms': round(profile.duration * 1000, 3),
+        'sample_interval_ms': profile.profiler.interval * 1000,
+        'samples': sum(profile.profiler.stacks.values()),
+        'sql_count': len(profile.queries),
+        'sql_ms': round(sum(query['duration_ms'] for query in profile.queries), 3),
+        'sql': profile.queries,
+        'stacks': dict(profile.profiler.stacks.most_common()),
+    }
+    # Write then rename, so a listing never sees a half-written profile.
+    temporary = directory / f'.{profile_id}.tmp'
+    temporary.write_text(json.dumps(data))
+    os.replace(temporary, directory / f'{profile_id}.json')
+    enforce_retention(directory)
+    return profile_id
+
+
+def enforce_retention(directory):
+    profiles = sorted(directory.glob('*.json'))
+    for stale in profiles[:max(0, len(profiles) - getattr(settings, 'PROFILER_MAX_PROFILES', 50))]:
+        stale.unlink(missing_ok=True)
+
+
+def list_profiles():
+    """Summaries of the stored profiles, newest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    summaries = []
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        data.pop('sql')
+        data.pop('stacks')
+        summaries.append(data)
+    return summaries
+
+
+def load_profile(profile_id):
+    """The stored profile as a dict, or None if there is no such profile."""
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    path = profile_dir() / f'{profile_id}.json'
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def collapsed_stacks(profile):
+    return ''.join(f'{stack} {count}\n' for stack, count in profile['stacks'].items())
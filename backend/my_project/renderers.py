@@ -0,0 +1,84 @@
+import orjson
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+_fallback_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    # Only types orjson can't handle itself get here (Decimal, lazy
+    # strings, UUIDs, timedeltas, querysets...). DRF's own encoder keeps
+    # the wire format identical to the stdlib renderer, e.g. a bare Decimal
+    # becomes a float while serializer DecimalFields are already strings.
+    return _fallback_encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Drop-in JSONRenderer that serializes with orjson. Timezone-aware
+    datetimes and NumPy scalars/arrays are encoded natively."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        option = ORJSON_OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=encode_default, option=option)
+
+
+class ORJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def msgpack_default(obj):
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return _fallback_encoder.default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImproperlyConfigured("MessagePackRenderer requires the 'msgpack' package.")
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=msgpack_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImproperlyConfigured("MessagePackParser requires the 'msgpack' package.")
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
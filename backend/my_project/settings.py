@@ -1,5 +1,5 @@
 import os
-from decouple import config
+from decouple import config, Csv
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -24,15 +24,45 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'my_project.middleware.ReplicaPinningMiddleware',
+    'my_project.middleware.CompressionMiddleware',
+    'my_project.middleware.ProfilingMiddleware',
+    'my_project.middleware.QueryContextMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'my_project.middleware.LeanSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'my_project.middleware.LeanCsrfViewMiddleware',
+    'my_project.middleware.LeanAuthenticationMiddleware',
+    'my_project.middleware.LeanMessageMiddleware',
+    'my_project.middleware.LeanXFrameOptionsMiddleware',
 ]
 
+# Path prefixes that skip session, CSRF, auth, message and clickjacking
+# middleware (the Lean* classes above). Session login to the API is not
+# available under them; clients use the auth token. Empty disables.
+LEAN_MIDDLEWARE_PATHS = config('LEAN_MIDDLEWARE_PATHS', default='/api/', cast=Csv())
+
+# Response compression; brotli and zstd are used when their packages are installed.
+COMPRESSION_ENCODINGS = ['zstd', 'br', 'gzip']
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_STREAM_BUFFER = config('COMPRESSION_STREAM_BUFFER', default=32 * 1024, cast=int)
+
+# Request profiling, off unless PROFILER_ENABLED. Admins then send an
+# X-Profile header to profile a request; PROFILER_SAMPLE_RATE profiles a
+# random fraction of all requests.
+PROFILER_ENABLED = config('PROFILER_ENABLED', default=False, cast=bool)
+PROFILER_SAMPLE_RATE = config('PROFILER_SAMPLE_RATE', default=0.0, cast=float)
+PROFILER_INTERVAL = config('PROFILER_INTERVAL', default=0.005, cast=float)
+PROFILER_DIR = config('PROFILER_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILER_MAX_PROFILES = config('PROFILER_MAX_PROFILES', default=50, cast=int)
+
+# Statements slower than this (ms) are logged to SlowQuery with their view
+# and an EXPLAIN plan captured in the background. None disables.
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=500, cast=lambda value: float(value) if value else None)
+# Store the parameters of slow statements too. Off by default: they include
+# token keys and password hashes.
+SLOW_QUERY_CAPTURE_PARAMS = config('SLOW_QUERY_CAPTURE_PARAMS', default=False, cast=bool)
+
 ROOT_URLCONF = 'my_project.urls'
 
 TEMPLATES = [
@@ -64,6 +94,60 @@ DATABASES = {
     }
 }
 
+# Reuse connections across requests from a per-process pool.
+if config('DATABASE_POOL', default=False, cast=bool):
+    DATABASES['default']['ENGINE'] = 'my_project.pooled_postgresql'
+    DATABASES['default']['POOL'] = {
+        'MIN_SIZE': config('DATABASE_POOL_MIN_SIZE', default=2, cast=int),
+        'MAX_SIZE': config('DATABASE_POOL_MAX_SIZE', default=20, cast=int),
+        'TIMEOUT': config('DATABASE_POOL_TIMEOUT', default=5, cast=float),
+        'CHECK_AFTER': config('DATABASE_POOL_CHECK_AFTER', default=30, cast=float),
+        'MAX_IDLE': config('DATABASE_POOL_MAX_IDLE', default=600, cast=float),
+    }
+
+# Read replicas, e.g. DATABASE_REPLICA_HOSTS=replica1.internal,replica2.internal
+REPLICA_DATABASES = []
+for index, host in enumerate(config('DATABASE_REPLICA_HOSTS', default='').split(',')):
+    if host.strip():
+        alias = f'replica{index + 1}'
+        DATABASES[alias] = {
+            **DATABASES['default'],
+            'HOST': host.strip(),
+            'TEST': {'MIRROR': 'default'},
+        }
+        REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['my_project.db_router.ReplicaRouter']
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=5, cast=float)
+REPLICA_LAG_CHECK_INTERVAL = config('REPLICA_LAG_CHECK_INTERVAL', default=5, cast=float)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# Shared cache for detail payloads and version stamps. Locmem is per-process;
+# point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached in production.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='inventory-management'),
+    }
+}
+DETAIL_CACHE_ALIAS = 'default'
+DETAIL_CACHE_TIMEOUT = config('DETAIL_CACHE_TIMEOUT', default=300, cast=int)
+
+# Responses to writes sent with an Idempotency-Key are kept this long for replay.
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60, cast=int)
+
+# Rows per transaction for supplier deletion jobs and bulk item endpoints.
+SUPPLIER_DELETE_BATCH_SIZE = config('SUPPLIER_DELETE_BATCH_SIZE', default=500, cast=int)
+BULK_CHUNK_SIZE = config('BULK_CHUNK_SIZE', default=500, cast=int)
+# Largest explicit id list a bulk request may send; bigger selections use filters.
+BULK_MAX_IDS = config('BULK_MAX_IDS', default=10000, cast=int)
+
+# Rows per record batch (and server-side cursor fetch) in Parquet/Arrow exports.
+EXPORT_BATCH_ROWS = config('EXPORT_BATCH_ROWS', default=10000, cast=int)
+# Incremental exports stop this many seconds short of now, so rows stamped
+# by a still-open transaction are not skipped; keep it above the longest write.
+EXPORT_WATERMARK_MARGIN = config('EXPORT_WATERMARK_MARGIN', default=60, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'authentication.cookies_custom_authenticate.CookieTokenAuthentication',
@@ -73,8 +157,22 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'my_project.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'my_project.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Lets clients send and request `application/msgpack` (needs `msgpack`).
+if config('API_MSGPACK', default=False, cast=bool):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('my_project.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('my_project.renderers.MessagePackParser')
+
 AUTH_COOKIE_NAME = 'auth_token'
 AUTH_COOKIE_MAX_AGE = 60 * 60 * 24 * 7 
 AUTH_COOKIE_SECURE = False  
@@ -98,11 +196,18 @@ CORS_ALLOWED_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
+    'if-match',
     'origin',
     'user-agent',
     'x-csrftoken',
+    'x-profile',
     'x-requested-with',
 ]
+# django-cors-headers reads CORS_ALLOW_HEADERS; the list above was never applied,
+# so browsers could not send If-Match on a preflighted PATCH.
+CORS_ALLOW_HEADERS = CORS_ALLOWED_HEADERS
+CORS_EXPOSE_HEADERS = ['etag', 'idempotent-replayed', 'x-export-watermark', 'x-profile-id']
 
 CORS_ALLOW_METHODS = [
     'DELETE',
@@ -136,6 +241,15 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@yourapp.com')
 PASSWORD_RESET_TIMEOUT = 3600  
 
+AUTHENTICATION_BACKENDS = ['authentication.backends.PooledModelBackend']
+
+# Password hashing runs on a bounded per-process pool (0 workers = one per
+# core). API logins beyond workers + max pending, or queued longer than the
+# timeout (seconds), get a 503 with Retry-After; /admin/ shows a failed login.
+LOGIN_HASH_WORKERS = config('LOGIN_HASH_WORKERS', default=0, cast=int)
+LOGIN_HASH_MAX_PENDING = config('LOGIN_HASH_MAX_PENDING', default=32, cast=int)
+LOGIN_HASH_TIMEOUT = config('LOGIN_HASH_TIMEOUT', default=5.0, cast=float)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -155,6 +269,8 @@ AUTH_PASSWORD_VALIDATORS = [
 LANGUAGE_CODE = 'en-us'
 # TIME_ZONE = 'UTC'
 TIME_ZONE = 'Asia/Kolkata'
+# Zone of the transaction feed's formatted_date and CSV export.
+TRANSACTION_FEED_TIMEZONE = 'Asia/Kolkata'
 USE_I18N = True
 USE_TZ = True
 
@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import queue
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.db.models import Avg, Count, Max, Sum
+
+logger = logging.getLogger(__name__)
+
+# View and path of the request being served, set by QueryContextMiddleware.
+current_view = ContextVar('current_view', default='')
+current_path = ContextVar('current_path', default='')
+# True while the recorder itself talks to the database.
+_suppressed = ContextVar('slow_query_suppressed', default=False)
+
+_queue = None
+_worker = None
+_worker_lock = threading.Lock()
+_dropped = 0
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_QUOTED = re.compile(r"'(?:[^']|'')*'")
+
+
+def fingerprint(sql):
+    """Hash of the statement with literals and IN-list lengths removed,
+    so the same query shape groups together."""
+    normalized = _IN_LISTS.sub('IN (...)', _LITERALS.sub('?', sql))
+    return hashlib.sha1(' '.join(normalized.split()).encode()).hexdigest()
+
+
+def threshold_ms():
+    return getattr(settings, 'SLOW_QUERY_MS', None)
+
+
+class SlowQueryRecorder:
+    """execute_wrapper that hands statements slower than SLOW_QUERY_MS
+    to the background writer; fast statements only cost a timer read."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            limit = threshold_ms()
+            if limit is not None and duration_ms >= limit and not _suppressed.get():
+                submit({
+                    'alias': self.alias,
+                    'sql': sql,
+                    'params': None if many else params,
+                    'many': many,
+                    'duration_ms': round(duration_ms, 3),
+                    'view_name': current_view.get(),
+                    'path': current_path.get(),
+                })
+
+
+def install_recorder(sender, connection, **kwargs):
+    if not any(isinstance(wrapper, SlowQueryRecorder) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryRecorder(connection.alias))
+
+
+def install():
+    connection_created.connect(install_recorder, dispatch_uid='slow_query_recorder')
+
+
+def submit(entry):
+    global _dropped
+    if not getattr(settings, 'SLOW_QUERY_ASYNC', True):
+        record(entry)
+        return
+    try:
+        _ensure_worker().put_nowait(entry)
+    except queue.Full:
+        _dropped += 1
+
+
+def _ensure_worker():
+    global _queue, _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _queue = queue.Queue(maxsize=getattr(settings, 'SLOW_QUERY_QUEUE_SIZE', 1000))
+            _worker = threading.Thread(target=_work, args=(_queue,), daemon=True, name='slow-query-log')
+            _worker.start()
+    return _queue
+
+
+def _work(entries):
+    while True:
+        entry = entries.get()
+        try:
+            record(entry)
+        except Exception:
+            logger.exception("Failed to record slow query")
+        finally:
+            close_old_connections()
+
+
+def explain(alias, sql, params):
+    """Plan for a SELECT, without executing it; None for other statements."""
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+
+def capture_params():
+    """Parameters carry token keys, password hashes and customer data, so
+    they are only stored (and left in plans) when asked for."""
+    return getattr(settings, 'SLOW_QUERY_CAPTURE_PARAMS', False)
+
+
+def record(entry):
+    token = _suppressed.set(True)
+    try:
+        SlowQuery = apps.get_model('inventory', 'SlowQuery')
+        params = entry['params']
+        slow_query = SlowQuery.objects.create(
+            sql=entry['sql'],
+            params=repr(params)[:2000] if params is not None and capture_params() else '',
+            fingerprint=fingerprint(entry['sql']),
+            duration_ms=entry['duration_ms'],
+            alias=entry['alias'],
+            view_name=entry['view_name'][:255],
+            path=entry['path'][:500],
+        )
+        if entry['many'] or not getattr(settings, 'SLOW_QUERY_EXPLAIN', True):
+            return slow_query
+        try:
+            plan = explain(entry['alias'], entry['sql'], params)
+        except Exception as e:
+            slow_query.plan, slow_query.plan_status = str(e), 'failed'
+        else:
+            if plan and not capture_params():
+                # PostgreSQL prints the bound values in filter conditions.
+                plan = _QUOTED.sub("'?'", plan)
+            slow_query.plan, slow_query.plan_status = plan or '', 'captured' if plan else 'skipped'
+        slow_query.save(update_fields=['plan', 'plan_status'])
+        return slow_query
+    finally:
+        _suppressed.reset(token)
+
+
+def top_fingerprints(queryset, limit):
+    """Query shapes in `queryset` ranked by total time spent, with the
+    latest example of each."""
+    groups = list(
+        queryset.values('fingerprint')
+        .annotate(
+            calls=Count('id'), total_ms=Sum('duration_ms'),
+            avg_ms=Avg('duration_ms'), max_ms=Max('duration_ms'), latest_id=Max('id'),
+        )
+        .order_by('-total_ms')[:limit]
+    )
+    examples = queryset.model.objects.in_bulk([group['latest_id'] for group in groups])
+    for group in groups:
+        example = examples[group['latest_id']]
+        group.update(sql=example.sql, view_name=example.view_name)
+    return groups
+
+
+def stats():
+    return {
+        'threshold_ms': threshold_ms(),
+        'queued': _queue.qsize() if _queue is not None else 0,
+        'dropped': _dropped,
+    }
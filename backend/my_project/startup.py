@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Heavy dependencies that must only load when a request needs them
+# (export backends, analytics); a worker importing them at boot is a
+# regression.
+LAZY_IMPORTS = ('xhtml2pdf', 'reportlab', 'pyhanko', 'pyarrow', 'xlsxwriter', 'numpy')
+
+_CHILD = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+from django.urls import get_resolver
+get_resolver().url_patterns
+seconds = time.perf_counter() - start
+# ru_maxrss survives exec on Linux (it would report the parent's peak);
+# VmHWM is this process's own high-water mark.
+try:
+    with open('/proc/self/status') as status:
+        max_rss_kb = next(int(line.split()[1]) for line in status if line.startswith('VmHWM:'))
+except (OSError, StopIteration):
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    'seconds': seconds,
+    'max_rss_kb': max_rss_kb,
+    'modules': sorted(sys.modules),
+}))
+"""
+
+
+def measure_startup(entry_point='my_project.wsgi'):
+    """Cold-start `entry_point` in a fresh interpreter.
+
+    Imports the WSGI/ASGI module and the URLconf (which a worker loads on
+    its first request) and returns the wall time, peak RSS in KiB and
+    the modules left loaded.
+    """
+    base_dir = Path(__file__).resolve().parent.parent
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(base_dir), env.get('PYTHONPATH')]))
+    result = subprocess.run(
+        [sys.executable, '-c', _CHILD, entry_point],
+        cwd=base_dir, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def eager_lazy_imports(modules):
+    return sorted({name.split('.')[0] for name in modules} & set(LAZY_IMPORTS))